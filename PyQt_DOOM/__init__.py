@@ -1 +1,4 @@
-from .PyQt_DOOM import start
+def start():
+    # the launcher is imported on call so that importing an engine submodule does not pull in PyQt5
+    from .PyQt_DOOM import start as _start
+    _start()
@@ -0,0 +1,130 @@
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from loguru import logger
+
+from PyQt_DOOM.kernels import line_of_sight, path_step, blocked_grid
+
+
+# npc state columns
+NPC_X, NPC_Y, NPC_ALIVE = range(3)
+# result columns, LOS is 1 when the npc sees the player, 0 when not and -1 when it could not be computed
+RES_LOS, RES_NEXT_X, RES_NEXT_Y = range(3)
+
+_world = {}
+
+
+def _attach(names, grid_shape, capacity):
+    for key, name in names.items():
+        _world[key + '_shm'] = shared_memory.SharedMemory(name=name)
+    _world['grid'] = np.ndarray(grid_shape, np.uint8, buffer=_world['grid_shm'].buf)
+    _world['npcs'] = np.ndarray((capacity, 3), np.float64, buffer=_world['npcs_shm'].buf)
+    _world['player'] = np.ndarray((2,), np.float64, buffer=_world['player_shm'].buf)
+    _world['results'] = np.ndarray((capacity, 3), np.float64, buffer=_world['results_shm'].buf)
+
+
+def _think(start, stop, count, max_depth):
+    grid, npcs, results = _world['grid'], _world['npcs'], _world['results']
+    px, py = _world['player']
+    goal = int(px), int(py)
+    blocked = blocked_grid(grid, {(int(x), int(y)) for x, y, alive in npcs[:count] if alive})
+    for i in range(start, stop):
+        x, y, alive = npcs[i]
+        if not alive:
+            continue
+        try:
+            results[i, RES_LOS] = line_of_sight(grid, px, py, math.atan2(y - py, x - px), int(x), int(y), max_depth)
+        except ZeroDivisionError:
+            results[i, RES_LOS] = -1
+        results[i, RES_NEXT_X], results[i, RES_NEXT_Y] = path_step(grid, blocked, int(x), int(y), *goal)
+
+
+class AIWorkers:
+    """
+    Computes NPC line of sight and path steps in a pool of worker processes.
+
+    The map grid, NPC state and player position live in shared memory. Every tick without a running job the state is
+    written and the NPC list is split between the workers, results are published to the NPCs once all partitions of
+    the job are done, so NPCs act on results that are a few frames old but the frame never waits for the AI.
+    """
+    def __init__(self, game, workers):
+        self.game = game
+        self.workers = workers
+        self.capacity = game.object_handler.enemies
+        self.grid_shape = game.map.rows, game.map.cols
+        self._shm = {
+            'grid': shared_memory.SharedMemory(create=True, size=self.grid_shape[0] * self.grid_shape[1]),
+            'npcs': shared_memory.SharedMemory(create=True, size=self.capacity * 3 * 8),
+            'player': shared_memory.SharedMemory(create=True, size=2 * 8),
+            'results': shared_memory.SharedMemory(create=True, size=self.capacity * 3 * 8),
+        }
+        self.grid = np.ndarray(self.grid_shape, np.uint8, buffer=self._shm['grid'].buf)
+        self.npcs = np.ndarray((self.capacity, 3), np.float64, buffer=self._shm['npcs'].buf)
+        self.player = np.ndarray((2,), np.float64, buffer=self._shm['player'].buf)
+        self.results = np.ndarray((self.capacity, 3), np.float64, buffer=self._shm['results'].buf)
+        names = {key: shm.name for key, shm in self._shm.items()}
+        self.pool = ProcessPoolExecutor(workers, mp_context=get_context('spawn'), initializer=_attach,
+                                        initargs=(names, self.grid_shape, self.capacity))
+        self.futures = []
+        self.job_npcs = []
+        self.published = {}
+        self.reset()
+        logger.debug(f"AIWorkers: {workers} worker processes started")
+
+    def reset(self):
+        self.wait()
+        self.futures = []
+        self.job_npcs = []
+        self.published = {}
+        self.grid[:] = 0
+        for (x, y), value in self.game.map.world_map.items():
+            self.grid[y, x] = 1
+
+    def wait(self):
+        for future in self.futures:
+            future.exception()
+
+    def result(self, npc):
+        """
+        :return:    (line of sight, start tile, next path tile) from the last finished job or None
+        """
+        return self.published.get(npc)
+
+    def publish(self):
+        self.published = {}
+        for i, npc in enumerate(self.job_npcs):
+            los, next_x, next_y = self.results[i]
+            if los >= 0:
+                x, y, alive = self.npcs[i]
+                self.published[npc] = bool(los), (int(x), int(y)), (int(next_x), int(next_y))
+
+    def submit(self):
+        self.job_npcs = self.game.object_handler.npc_list[:self.capacity]
+        count = len(self.job_npcs)
+        for i, npc in enumerate(self.job_npcs):
+            self.npcs[i] = npc.x, npc.y, npc.alive
+        self.player[:] = self.game.player.pos
+        self.results[:count] = -1
+        chunk = math.ceil(count / self.workers) if count else 0
+        max_depth = self.game.settings.MAX_DEPTH
+        self.futures = [self.pool.submit(_think, start, min(start + chunk, count), count, max_depth)
+                        for start in range(0, count, chunk or 1)]
+
+    def update(self):
+        if self.futures:
+            if not all(future.done() for future in self.futures):
+                return
+            for future in self.futures:
+                if future.exception() is not None:
+                    logger.debug(f"AIWorkers: {future.exception()}")
+            self.publish()
+        self.submit()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.grid = self.npcs = self.player = self.results = None
+        for shm in self._shm.values():
+            shm.close()
+            shm.unlink()
+        self._shm = {}
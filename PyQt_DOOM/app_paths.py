@@ -0,0 +1,15 @@
+import pathlib as pl
+import os
+
+
+def app_dir() -> pl.Path:
+    """
+    Folder of the settings, the scores and the reports written by the game, read on every call so it follows the
+    environment of the running process.
+
+    :return:    PyQt_DOOM in LOCALAPPDATA on Windows, in XDG_DATA_HOME or ~/.local/share when LOCALAPPDATA is not set
+    """
+    base = os.getenv('LOCALAPPDATA') or os.getenv('XDG_DATA_HOME')
+    if not base:
+        base = pl.Path.home() / '.local' / 'share'
+    return pl.Path(base) / 'PyQt_DOOM'
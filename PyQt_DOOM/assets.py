@@ -0,0 +1,220 @@
+import pygame as pg
+import pathlib as pl
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+from PyQt_DOOM.atlas import Atlas
+from PyQt_DOOM.mipmap import MipChain
+
+
+_package_dir = pl.Path(__file__).parent
+
+
+class AssetManager:
+    """
+    Process-wide image cache.
+
+    Resolves paths inside the active resource pack, decodes and converts every file exactly once and keeps derived
+    (scaled) variants keyed by path and size and the mip chains of loaded surfaces, so restarting a level or
+    constructing another sprite never touches the disk again. Raw pixels are taken from the memory-mapped atlas when
+    one is built, the png is decoded otherwise.
+    """
+    def __init__(self):
+        self.original_pack = False
+        self._images = {}
+        self._variants = {}
+        self._mips = {}
+        self._listings = {}
+        self._atlas = None
+        self._atlas_checked = False
+        self.load_time = 0.0
+        self.loads = 0
+        self.atlas_loads = 0
+        self.hits = 0
+        self.load_times = {}
+
+    @staticmethod
+    def pack_dir(original_pack) -> pl.Path:
+        return _package_dir / ('resources' if original_pack else 'resources_alt')
+
+    def select_pack(self, original_pack):
+        self.original_pack = original_pack
+
+    def path(self, *parts) -> str:
+        return str(self.pack_dir(self.original_pack).joinpath(*parts))
+
+    def list_dir(self, path) -> tuple:
+        """
+        :return:    paths of the files in the directory in file name order
+        """
+        path = str(path)
+        files = self._listings.get(path)
+        if files is None:
+            files = tuple(os.path.join(path, f) for f in sorted(os.listdir(path)) if os.path.isfile(os.path.join(path, f)))
+            self._listings[path] = files
+        return files
+
+    def _decode(self, path):
+        """
+        Load the raw pixels of one file, safe to call from worker threads.
+
+        :return:    path, unconverted surface, decode time in seconds
+        """
+        time_start = time.perf_counter()
+        image = self.atlas_surface(path)
+        from_atlas = image is not None
+        if image is None:
+            image = pg.image.load(path)
+        return path, image, from_atlas, time.perf_counter() - time_start
+
+    def _store(self, path, image, from_atlas, decode_time):
+        time_start = time.perf_counter()
+        image = image.convert_alpha()
+        load_time = decode_time + time.perf_counter() - time_start
+        self.load_time += load_time
+        self.load_times[path] = load_time
+        self.loads += 1
+        self.atlas_loads += from_atlas
+        self._images[path] = image
+        return image
+
+    def image(self, path) -> pg.Surface:
+        path = str(path)
+        image = self._images.get(path)
+        if image is None:
+            image = self._store(*self._decode(path))
+        else:
+            self.hits += 1
+        return image
+
+    def pack_images(self) -> list:
+        """
+        :return:    every sprite and texture file of the active pack
+        """
+        return [file_path for image_dir in ('textures', 'sprites')
+                for root, dirs, files in os.walk(self.path(image_dir))
+                for file_path in self.list_dir(root)]
+
+    def missing(self, paths) -> list:
+        """
+        :return:    the paths without a cached image, duplicates removed
+        """
+        return [p for p in dict.fromkeys(map(str, paths)) if p not in self._images]
+
+    def decode(self, paths) -> list:
+        """
+        Decode the files that are not cached yet without converting them, safe to call from a worker thread. The result
+        is handed to store on the main thread.
+        """
+        return [self._decode(p) for p in self.missing(paths)]
+
+    def store(self, decoded):
+        for path, image, from_atlas, decode_time in decoded:
+            if path not in self._images:
+                self._store(path, image, from_atlas, decode_time)
+
+    def preload(self, paths=None, workers=None):
+        """
+        Decode the files in a thread pool, only the display dependent convert_alpha runs on the calling thread.
+
+        :param paths:       files to load, every image of the active pack by default
+        :param workers:     thread count, one per CPU by default
+        """
+        time_start = time.perf_counter()
+        if paths is None:
+            paths = self.pack_images()
+        paths = self.missing(paths)
+        if not paths:
+            return
+        self.atlas()  # open the atlas before the workers share it
+        workers = workers or min(8, os.cpu_count() or 1)
+        with ThreadPoolExecutor(workers) as executor:
+            for decoded in executor.map(self._decode, paths):
+                self._store(*decoded)
+        wall_time = time.perf_counter() - time_start
+        slowest = sorted(paths, key=self.load_times.get, reverse=True)[:3]
+        logger.debug(f"AssetManager: preloaded {len(paths)} images with {workers} threads in {wall_time * 1000:.1f} ms "
+                     f"(sum of per-asset times {sum(self.load_times[p] for p in paths) * 1000:.1f} ms), slowest: "
+                     + ', '.join(f"{pl.Path(p).name} {self.load_times[p] * 1000:.1f} ms" for p in slowest))
+
+    def atlas(self):
+        """
+        :return:    the memory-mapped atlas, opened on first use, or None when it is not built
+        """
+        if not self._atlas_checked:
+            self._atlas = Atlas.open()
+            self._atlas_checked = True
+            if self._atlas is None:
+                logger.debug("AssetManager: no atlas, decoding png files")
+        return self._atlas
+
+    def atlas_surface(self, path):
+        atlas = self.atlas()
+        if atlas is not None:
+            return atlas.surface(path)
+
+    def scaled(self, path, size, smooth=False) -> pg.Surface:
+        key = str(path), (int(size[0]), int(size[1])), smooth
+        image = self._variants.get(key)
+        if image is None:
+            scale = pg.transform.smoothscale if smooth else pg.transform.scale
+            image = scale(self.image(path), key[1])
+            self._variants[key] = image
+        else:
+            self.hits += 1
+        return image
+
+    def mipmap(self, image) -> MipChain:
+        """
+        :return:    mip chain of a surface returned by image or scaled, built on the first call
+        """
+        mips = self._mips.get(image)
+        if mips is None:
+            mips = MipChain(image)
+            self._mips[image] = mips
+        return mips
+
+    def clear(self):
+        self._images.clear()
+        self._variants.clear()
+        self._mips.clear()
+        self._listings.clear()
+        self.load_times.clear()
+        if self._atlas is not None:
+            self._atlas.close()
+        self._atlas = None
+        self._atlas_checked = False
+
+    @staticmethod
+    def _footprint(images) -> int:
+        return sum(img.get_pitch() * img.get_height() for img in images)
+
+    def memory_footprint(self) -> int:
+        """
+        :return:    pixel memory held by decoded images, their variants and mip chains in bytes
+        """
+        return (self._footprint(self._images.values()) + self._footprint(self._variants.values())
+                + sum(mips.memory_footprint() for mips in self._mips.values()))
+
+    def stats(self) -> dict:
+        return {
+            'images': len(self._images),
+            'variants': len(self._variants),
+            'mip_chains': len(self._mips),
+            'loads': self.loads,
+            'atlas_loads': self.atlas_loads,
+            'hits': self.hits,
+            'load_time': self.load_time,
+            'load_times': dict(self.load_times),
+            'memory': self.memory_footprint(),
+        }
+
+    def report(self):
+        logger.debug(f"AssetManager: {len(self._images)} images, {len(self._variants)} variants, {len(self._mips)} mip chains, "
+                     f"{self.loads} loads ({self.atlas_loads} from atlas) in {self.load_time * 1000:.1f} ms, {self.hits} cache hits, "
+                     f"{self.memory_footprint() / 2 ** 20:.2f} MiB")
+
+
+assets = AssetManager()
@@ -0,0 +1,131 @@
+import pygame as pg
+import pathlib as pl
+import struct
+import mmap
+import json
+import os
+from loguru import logger
+
+
+_package_dir = pl.Path(__file__).parent
+_packs = 'resources', 'resources_alt'
+_image_dirs = 'sprites', 'textures'
+
+ATLAS_PATH = _package_dir / 'atlas.bin'
+ATLAS_MAGIC = b'PQDATLAS'
+ATLAS_VERSION = 1
+# magic, version, index size
+_header = struct.Struct('<8sIQ')
+_alignment = 16
+
+
+def _source_files():
+    for pack in _packs:
+        for image_dir in _image_dirs:
+            for root, dirs, files in os.walk(_package_dir / pack / image_dir):
+                for file_name in sorted(files):
+                    if file_name.endswith('.png'):
+                        yield pl.Path(root) / file_name
+
+
+def _key(path) -> str:
+    return pl.Path(path).resolve().relative_to(_package_dir.resolve()).as_posix()
+
+
+def build_atlas(path=ATLAS_PATH):
+    """
+    Decode every sprite and texture png of both resource packs and store the raw RGBA pixels in one file, preceded by
+    a json index of offsets, sizes and the source file stamps used to detect stale entries.
+    """
+    entries = {}
+    blobs = []
+    offset = 0
+    for source in _source_files():
+        image = pg.image.load(str(source))
+        pixels = pg.image.tobytes(image, 'RGBA')
+        stat = source.stat()
+        entries[_key(source)] = {
+            'offset': offset,
+            'width': image.get_width(),
+            'height': image.get_height(),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+        }
+        blobs.append(pixels)
+        padding = -len(pixels) % _alignment
+        blobs.append(b'\0' * padding)
+        offset += len(pixels) + padding
+
+    index = json.dumps(entries).encode()
+    index += b' ' * (-(_header.size + len(index)) % _alignment)
+    with open(path, 'wb') as f:
+        f.write(_header.pack(ATLAS_MAGIC, ATLAS_VERSION, len(index)))
+        f.write(index)
+        for blob in blobs:
+            f.write(blob)
+    logger.info(f"Atlas: {len(entries)} images, {(_header.size + len(index) + offset) / 2 ** 20:.1f} MiB written to {path}")
+
+
+class Atlas:
+    """
+    Memory-mapped atlas written by build_atlas. Surfaces are created straight over the mapped pixels, entries whose
+    source png changed since the build are reported as missing so the caller falls back to decoding the png.
+    """
+    def __init__(self, path=ATLAS_PATH):
+        self.path = pl.Path(path)
+        self._view = None
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_size = _header.unpack_from(self._mmap)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {ATLAS_VERSION} atlas")
+        self.entries = json.loads(self._mmap[_header.size:_header.size + index_size])
+        self.data_start = _header.size + index_size
+        self._view = memoryview(self._mmap)
+
+    @classmethod
+    def open(cls, path=ATLAS_PATH):
+        """
+        :return:    the atlas or None when the file is missing or unreadable
+        """
+        if not pl.Path(path).is_file():
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug(f"Atlas: {e}")
+            return None
+
+    def surface(self, path):
+        """
+        :return:    RGBA surface over the mapped pixels or None when the image is not in the atlas or is stale
+        """
+        try:
+            entry = self.entries.get(_key(path))
+        except ValueError:
+            return None
+        if entry is None:
+            return None
+        stat = os.stat(path)
+        if stat.st_mtime_ns != entry['mtime_ns'] or stat.st_size != entry['size']:
+            return None
+        start = self.data_start + entry['offset']
+        size = (entry['width'], entry['height'])
+        return pg.image.frombuffer(self._view[start:start + size[0] * size[1] * 4], size, 'RGBA')
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # the mapping is unmapped when the last surface over it is freed
+            logger.warning(f"Atlas: surfaces over {self.path.name} still exist, the mapping stays open until they "
+                           f"are freed")
+        self._file.close()
+
+
+if __name__ == '__main__':
+    build_atlas()
@@ -0,0 +1,96 @@
+import threading
+import time
+from loguru import logger
+
+
+TRACE, DEBUG, INFO, SUCCESS, WARNING, ERROR, CRITICAL = 5, 10, 20, 25, 30, 40, 50
+_level_names = {TRACE: 'TRACE', DEBUG: 'DEBUG', INFO: 'INFO', SUCCESS: 'SUCCESS', WARNING: 'WARNING', ERROR: 'ERROR',
+                CRITICAL: 'CRITICAL'}
+
+
+class EventType:
+    """
+    Kind of game loop event: its level and the message the record arguments are formatted into when it is flushed.
+    """
+    def __init__(self, name, level, message):
+        self.name = name
+        self.level = level
+        self.level_name = _level_names[level]
+        self.message = message
+
+
+class EventLog:
+    """
+    Log for the game loop.
+
+    A record is the event type, the time and the unformatted arguments, stored into preallocated slots of a ring
+    buffer. Events below the level return after one comparison. A background thread formats the records and passes
+    them to loguru every interval seconds, records overwritten before they were flushed are counted as dropped. Writes
+    are serialized by a lock taken only for events at or above the level, the render thread of the pipelined loop logs
+    too.
+    """
+    def __init__(self, capacity=4096, level=DEBUG, interval=0.25):
+        self.capacity = capacity
+        self.level = level
+        self.interval = interval
+        self.times = [0.0] * capacity
+        self.types = [None] * capacity
+        self.args = [()] * capacity
+        self.written = 0
+        self.flushed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enabled(self, level) -> bool:
+        return level >= self.level
+
+    def log(self, event_type, *args):
+        if event_type.level < self.level:
+            return
+        with self._write_lock:
+            i = self.written % self.capacity
+            self.times[i] = time.time()
+            self.types[i] = event_type
+            self.args[i] = args
+            self.written += 1
+
+    def flush(self):
+        with self._lock:
+            written = self.written
+            start = max(self.flushed, written - self.capacity)
+            self.dropped += start - self.flushed
+            for n in range(start, written):
+                i = n % self.capacity
+                event_type = self.types[i]
+                logger.bind(event=event_type.name, event_time=self.times[i]).log(
+                    event_type.level_name, event_type.message.format(*self.args[i]))
+            self.flushed = written
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='event_log', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Stop the flushing thread and flush the remaining records.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning(f"EventLog: {self.dropped} records dropped")
+
+
+event_log = EventLog()
@@ -0,0 +1,53 @@
+from loguru import logger
+
+from PyQt_DOOM.assets import assets
+
+
+class FrameStore:
+    """
+    Process-wide store of decoded animation frames.
+
+    Frames are keyed by sprite directory and decoded only once, every sprite
+    animating from the same directory shares the same tuple of surfaces. The
+    mip chain of every frame is built with it.
+    """
+    def __init__(self):
+        self._frames = {}
+
+    def get(self, path) -> tuple:
+        path = str(path)
+        frames = self._frames.get(path)
+        if frames is None:
+            frames = self._load(path)
+            self._frames[path] = frames
+        return frames
+
+    @staticmethod
+    def _load(path) -> tuple:
+        frames = tuple(assets.image(file_path) for file_path in assets.list_dir(path))
+        for frame in frames:
+            assets.mipmap(frame)
+        logger.debug(f"FrameStore: {len(frames)} frames decoded from {path}")
+        return frames
+
+    def clear(self):
+        self._frames.clear()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def frame_count(self) -> int:
+        return sum(len(frames) for frames in self._frames.values())
+
+    def memory_footprint(self) -> int:
+        """
+        :return:    pixel memory held by the stored frames in bytes
+        """
+        return sum(img.get_pitch() * img.get_height() for frames in self._frames.values() for img in frames)
+
+    def report(self):
+        logger.debug(f"FrameStore: {len(self)} sequences, {self.frame_count()} frames, "
+                     f"{self.memory_footprint() / 2 ** 20:.2f} MiB")
+
+
+frame_store = FrameStore()
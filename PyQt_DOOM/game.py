@@ -0,0 +1,289 @@
+import pygame as pg
+import time
+import random
+import gc
+from time import perf_counter
+from loguru import logger
+
+from PyQt_DOOM.map import Map
+from PyQt_DOOM.player import Player
+from PyQt_DOOM.raycasting import RayCasting
+from PyQt_DOOM.object_renderer import ObjectRenderer
+from PyQt_DOOM.object_handler import ObjectHandler
+from PyQt_DOOM.weapon import Weapon
+from PyQt_DOOM.sound import Sound, sound_manager
+from PyQt_DOOM.pathfinding import PathFinding
+from PyQt_DOOM.hitscan import HitScan
+from PyQt_DOOM.level_loader import LevelLoader
+from PyQt_DOOM.profiler import FrameProfiler, EVENTS, PLAYER, NPC_AI, WEAPON, DRAW, FLIP, WAIT, LEVEL_LOAD
+from PyQt_DOOM.telemetry import FrameTelemetry
+from PyQt_DOOM.event_log import event_log
+from PyQt_DOOM.frame_store import frame_store
+from PyQt_DOOM.assets import assets
+
+
+class Game:
+    def __init__(self, score_plus, score_reset, finished_fnc, get_score, settings, host=None):
+        """
+        :param host:    Replay or GameView providing the display, the clock and the input instead of pygame
+        """
+        pg.init()
+        self.score_plus = score_plus
+        self.score_reset = score_reset
+        self.finished_fnc = finished_fnc
+        self.get_score = get_score
+        self.settings = settings
+        assets.select_pack(settings.original_pack)
+        self.map = None
+        self.player = None
+        self.object_renderer = None
+        self.object_handler = None
+        self.raycasting = None
+        self.weapon = None
+        self.sound = None
+        self.pathfinding = None
+        self.hitscan = None
+        self.ai_workers = None
+        self.kernels = None
+        if settings.jit_kernels:
+            from PyQt_DOOM import kernels
+            if kernels.JIT:
+                kernels.compile_kernels()
+                self.kernels = kernels
+        self.level_loader = LevelLoader(self)
+        self.profiler = FrameProfiler()
+        self.telemetry = FrameTelemetry()
+        self.level = 0
+        self.running = True
+        self.memory_monitor = None
+        if settings.memory_monitor:
+            from PyQt_DOOM.memory import MemoryMonitor
+            self.memory_monitor = MemoryMonitor(self)
+        # win or game over screen shown between levels: draw function, reset score, end time
+        self.transition = None
+        self.transition_time = 1500
+        self.host = host
+        self.recorder = None
+        if host is None:
+            self.clock = pg.time.Clock()
+            self.set_mode, self.flip = pg.display.set_mode, pg.display.flip
+            self.get_ticks, self.get_events = pg.time.get_ticks, pg.event.get
+            self.get_pressed, self.get_rel = pg.key.get_pressed, pg.mouse.get_rel
+            set_timer = pg.time.set_timer
+            if settings.record_replay:
+                from PyQt_DOOM.replay import Recorder
+                self.recorder = Recorder()
+        else:
+            self.clock = host
+            self.set_mode, self.flip = host.set_mode, host.flip
+            self.get_ticks, self.get_events = host.get_ticks, host.get_events
+            self.get_pressed, self.get_rel = host.get_pressed, host.get_rel
+            set_timer = host.set_timer
+            if host.seed is not None:
+                random.seed(host.seed)
+        if settings.fullscreen:
+            self.screen = self.set_mode(settings.resolution, pg.FULLSCREEN)
+        else:
+            self.screen = self.set_mode(settings.resolution)
+        if host is None:
+            pg.mouse.set_visible(False)
+            pg.event.set_grab(True)
+        self.delta_time = 1
+        self.global_trigger = False
+        self.global_event = pg.USEREVENT + 0
+        set_timer(self.global_event, 40)
+        self.new_game()
+        self.pipeline = None
+        if settings.pipelined_render:
+            from PyQt_DOOM.pipeline import RenderPipeline
+            self.pipeline = RenderPipeline(self)
+
+    def new_game(self, reset_score=True):
+        """
+        Start a new level. Objects holding loaded surfaces and sounds are created on the first call only and are reset
+        on every following one. The map, pathfinding graph and spawn tiles come from the level loader, which starts
+        preparing the next level as soon as this one is running.
+
+        Objects surviving the level start are frozen out of garbage collection, so collections during the level do not
+        walk the loaded surfaces, maps and graphs again and again.
+        """
+        time_start = time.perf_counter()
+        if reset_score:
+            self.score_reset()
+            self.level = 0
+        self.level += 1
+        self.transition = None
+        if self.object_renderer is None:
+            assets.preload()
+        level = self.level_loader.take()
+        self.map = level.map
+        self.player = Player(self)
+        if self.object_renderer is None:
+            self.object_renderer = ObjectRenderer(self)
+            self.raycasting = RayCasting(self)
+            self.object_handler = ObjectHandler(self, level.regions)
+            self.weapon = Weapon(self)
+            self.sound = Sound(self, self.settings)
+            self.hitscan = HitScan(self)
+            if self.settings.ai_workers:
+                from PyQt_DOOM.ai_workers import AIWorkers
+                self.ai_workers = AIWorkers(self, self.settings.ai_workers)
+        else:
+            self.raycasting.reset()
+            self.object_handler.reset(level.regions)
+            self.weapon.reset()
+            if self.ai_workers is not None:
+                self.ai_workers.reset()
+        # cached paths hold the previous PathFinding instance and its graph
+        PathFinding.get_path.cache_clear()
+        self.pathfinding = PathFinding(self, level.graph)
+        pg.mixer.music.play(-1)
+        assets.report()
+        if self.memory_monitor is not None:
+            self.memory_monitor.level_boundary(self.level)
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        logger.debug(f"Level ready in {(time.perf_counter() - time_start) * 1000:.1f} ms")
+        self.level_loader.prepare()
+
+    def end_level(self, draw_fnc, reset_score):
+        """
+        Show the win or game over screen for transition_time ms while the loop keeps running, then start the next level.
+
+        :param draw_fnc:    draws the screen
+        :param reset_score: passed to new_game
+        """
+        self.transition = draw_fnc, reset_score, self.get_ticks() + self.transition_time
+
+    def update_transition(self):
+        self.present()
+        self.end_transition()
+
+    def end_transition(self):
+        draw_fnc, reset_score, time_end = self.transition
+        if self.get_ticks() >= time_end:
+            time_start = perf_counter()
+            self.new_game(reset_score=reset_score)
+            self.profiler.lap(LEVEL_LOAD, time_start)
+
+    def update(self):
+        if self.transition is not None:
+            self.update_transition()
+            return
+        self.simulate()
+        self.present()
+
+    def simulate(self):
+        profiler = self.profiler
+        time_start = perf_counter()
+        self.player.update()
+        time_start = profiler.lap(PLAYER, time_start)
+        self.raycasting.update()
+        time_start = perf_counter()
+        if self.ai_workers is not None:
+            self.ai_workers.update()
+            profiler.lap(NPC_AI, time_start)
+        self.object_handler.update()
+        time_start = perf_counter()
+        self.weapon.update()
+        profiler.lap(WEAPON, time_start)
+
+    def present(self):
+        """
+        Show the drawn frame and wait for the FPS limit.
+        """
+        time_start = perf_counter()
+        self.flip()
+        time_start = self.profiler.lap(FLIP, time_start)
+        self.delta_time = self.clock.tick(self.settings.fps_limit)
+        self.profiler.lap(WAIT, time_start)
+        if self.transition is None:
+            pg.display.set_caption(f'{self.clock.get_fps() :.1f}')
+
+    def draw(self):
+        time_start = perf_counter()
+        if self.transition is not None:
+            self.transition[0]()
+        else:
+            # self.screen.fill('black')
+            self.object_renderer.draw()
+            self.weapon.draw()
+        self.profiler.lap(DRAW, time_start)
+        self.profiler.draw_overlay(self.screen)
+        # self.map.draw()
+        # self.player.draw()
+
+    def check_events(self):
+        time_start = perf_counter()
+        self.global_trigger = False
+        for event in self.get_events():
+            if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                self.running = False
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self.profiler.toggle_overlay()
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F4:
+                self.profiler.export()
+            elif event.type == self.global_event:
+                self.global_trigger = True
+            if self.transition is None:
+                self.player.single_fire_event(event)
+            if self.recorder is not None:
+                self.recorder.event(event)
+        self.profiler.lap(EVENTS, time_start)
+
+    def step(self):
+        if self.pipeline is not None:
+            self.pipeline.step()
+            return
+        self.check_events()
+        self.update()
+        self.draw()
+
+    def run_frame(self):
+        """
+        Run one frame of the loop, called by run or by the timer of a GameView.
+        """
+        self.profiler.begin_frame()
+        self.step()
+        self.profiler.end_frame()
+        self.telemetry.add(self.profiler.frame, self.level)
+        if self.recorder is not None:
+            self.recorder.end_frame(self.player.rel)
+
+    def run(self, end_frame=None):
+        """
+        :param end_frame:   called after every frame
+        """
+        event_log.start()
+        try:
+            while self.running:
+                self.run_frame()
+                if end_frame is not None:
+                    end_frame()
+        except Exception:
+            logger.exception("Game loop failed")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        logger.info("Game terminated")
+        if self.pipeline is not None:
+            self.pipeline.close()
+        self.telemetry.write_session(self.settings)
+        if self.recorder is not None:
+            self.recorder.write(self.settings)
+        self.profiler.close()
+        if self.memory_monitor is not None:
+            self.memory_monitor.close()
+        event_log.close()
+        self.level_loader.close()
+        frame_store.clear()
+        assets.clear()
+        if self.ai_workers is not None:
+            self.ai_workers.close()
+        sound_manager.quit()
+        pg.quit()
+        # objects frozen at the level starts become collectable again, the launcher process keeps running
+        gc.unfreeze()
+        gc.collect()
@@ -0,0 +1,134 @@
+import time
+from multiprocessing import get_context
+from loguru import logger
+
+from PyQt_DOOM.score_store import kill_score
+
+
+# score channel events, every message is the list of (event, argument) of one frame
+SCORE_PLUS, SCORE_RESET, GAME_FINISHED = range(3)
+
+
+class ScoreChannel:
+    """
+    Game side of the score channel. Score changes of a frame are collected and sent to the launcher in one message at
+    the end of the frame, nothing is sent for frames without a change. The score drawn by the game is counted here, so
+    the frame never waits for the launcher.
+    """
+    def __init__(self, connection, frame):
+        """
+        :param connection:  sending end of the pipe to the launcher
+        :param frame:       shared frame counter, read by the launcher to detect a stalled game
+        """
+        self.connection = connection
+        self.frame = frame
+        self.score = 0
+        self.events = []
+
+    def score_plus(self, enemy_type=''):
+        self.score += kill_score(enemy_type)
+        self.events.append((SCORE_PLUS, enemy_type))
+
+    def score_reset(self):
+        self.score = 0
+        self.events.append((SCORE_RESET, None))
+
+    def finished(self):
+        self.events.append((GAME_FINISHED, None))
+
+    def get_score(self) -> int:
+        return self.score
+
+    def end_frame(self):
+        self.frame.value += 1
+        if self.events:
+            self.connection.send(self.events)
+            self.events = []
+
+    def close(self):
+        self.end_frame()
+        self.connection.close()
+
+
+def run_game(connection, frame):
+    """
+    Entry of the game process.
+    """
+    from PyQt_DOOM.game import Game
+    from PyQt_DOOM.src.game_settings.settings import GameSettings
+    channel = ScoreChannel(connection, frame)
+    try:
+        game = Game(channel.score_plus, channel.score_reset, channel.finished, channel.get_score, GameSettings())
+        game.run(end_frame=channel.end_frame)
+    finally:
+        channel.close()
+
+
+class GameProcess:
+    """
+    Launcher side of a game running in a separate process, used with the game_process setting.
+
+    The game gets its own interpreter, so a crash or a stall of the game does not affect the launcher and the game loop
+    never calls the launcher. Score events come through a one way pipe and are applied to the launcher by poll, which
+    the launcher calls from a timer and which never blocks. A frame counter in shared memory tells whether the game
+    still runs frames.
+    """
+    def __init__(self, score_plus, score_reset, finished_fnc, stall_s=5.0):
+        """
+        :param stall_s: a game running no frame for this many seconds is reported as stalled, the start up before the
+                        first frame is not checked
+        """
+        self.score_plus = score_plus
+        self.score_reset = score_reset
+        self.finished_fnc = finished_fnc
+        self.stall_s = stall_s
+        context = get_context('spawn')
+        self.connection, child_connection = context.Pipe(duplex=False)
+        self.frame = context.RawValue('Q', 0)
+        # not a daemon, the game starts its own AI worker processes
+        self.process = context.Process(target=run_game, args=(child_connection, self.frame), name='PyQt_DOOM game')
+        self.process.start()
+        child_connection.close()
+        self._last_frame = 0
+        self._last_frame_time = time.perf_counter()
+        self._stalled = False
+        logger.debug(f"GameProcess: game started in process {self.process.pid}")
+
+    def poll(self) -> bool:
+        """
+        Apply the score events sent since the last call.
+
+        :return:    True while the game process runs, the finished function is called once when it has ended
+        """
+        alive = self.process.is_alive()
+        try:
+            while self.connection.poll():
+                for event, argument in self.connection.recv():
+                    if event == SCORE_PLUS:
+                        self.score_plus(argument)
+                    elif event == SCORE_RESET:
+                        self.score_reset()
+                    elif event == GAME_FINISHED:
+                        self.finished_fnc()
+        except EOFError:
+            # the game closed its end of the pipe
+            pass
+        if alive:
+            self.check_stall()
+            return True
+        self.process.join()
+        self.connection.close()
+        if self.process.exitcode:
+            logger.error(f"GameProcess: game process exited with code {self.process.exitcode}")
+        self.finished_fnc()
+        return False
+
+    def check_stall(self):
+        frame, time_now = self.frame.value, time.perf_counter()
+        if frame != self._last_frame:
+            if self._stalled:
+                logger.info(f"GameProcess: game running again after {time_now - self._last_frame_time:.1f} s")
+            self._last_frame, self._last_frame_time, self._stalled = frame, time_now, False
+        elif frame and not self._stalled and time_now - self._last_frame_time > self.stall_s:
+            self._stalled = True
+            logger.warning(f"GameProcess: no frame for {self.stall_s:.0f} s, the game is stalled")
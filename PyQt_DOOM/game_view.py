@@ -0,0 +1,161 @@
+import pygame as pg
+from loguru import logger
+
+from PyQt5 import sip
+from PyQt5.QtCore import Qt, QTimer, QRect, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QCursor
+from PyQt5.QtWidgets import QWidget
+
+from PyQt_DOOM.game import Game
+from PyQt_DOOM.replay import KeyState
+from PyQt_DOOM.event_log import event_log
+
+
+_movement_keys = {Qt.Key_W: pg.K_w, Qt.Key_A: pg.K_a, Qt.Key_S: pg.K_s, Qt.Key_D: pg.K_d}
+# keys sent to the game as KEYDOWN events
+_event_keys = {Qt.Key_Escape: pg.K_ESCAPE, Qt.Key_F3: pg.K_F3, Qt.Key_F4: pg.K_F4}
+
+
+class GameView(QWidget):
+    """
+    Window of the launcher showing the game, used with the embedded_view setting.
+
+    The game draws to an offscreen pygame surface and the view paints a QImage sharing the pixel memory of that surface,
+    the frame is never copied. A QTimer runs one frame of the game loop per timeout, so the launcher keeps handling its
+    events while the game runs. The view is the host of the game: it provides the display, the clock and the input
+    translated from Qt events. The frame is painted synchronously when the game flips the display, while nothing draws
+    to the surface.
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, score_plus, score_reset, finished_fnc, get_score, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        # the game is not seeded
+        self.seed = None
+        self.surface = None
+        self.image = None
+        self._clock = pg.time.Clock()
+        self._pressed = KeyState()
+        self._events = []
+        self._rel = 0
+        self.setWindowTitle("PyQt DOOM")
+        self.setMouseTracking(True)
+        self.setCursor(Qt.BlankCursor)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.game = Game(score_plus, score_reset, finished_fnc, get_score, settings, host=self)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.run_frame)
+        self.finished.connect(finished_fnc)
+
+    def start(self):
+        event_log.start()
+        fps_limit = self.settings.fps_limit
+        self.timer.start(1000 // fps_limit if fps_limit else 0)
+
+    def run_frame(self):
+        try:
+            self.game.run_frame()
+        except Exception:
+            logger.exception("Game loop failed")
+            self.game.running = False
+        if not self.game.running:
+            self.stop()
+
+    def stop(self):
+        self.timer.stop()
+        self.image = None
+        self.game.shutdown()
+        self.close()
+        self.finished.emit()
+
+    # display
+
+    def set_mode(self, size, flags=0):
+        # images are converted to the format of the display, a hidden one is enough
+        pg.display.set_mode((1, 1), pg.HIDDEN)
+        self.surface = pg.Surface(size, 0, 32)
+        self.image = QImage(sip.voidptr(self.surface._pixels_address), size[0], size[1], self.surface.get_pitch(),
+                            QImage.Format_RGB32)
+        if flags & pg.FULLSCREEN:
+            self.showFullScreen()
+        else:
+            self.resize(*size)
+            self.show()
+        self.activateWindow()
+        return self.surface
+
+    def flip(self):
+        self.repaint()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self.image is not None:
+            size = self.image.size().scaled(self.size(), Qt.KeepAspectRatio)
+            target = QRect((self.width() - size.width()) // 2, (self.height() - size.height()) // 2, size.width(),
+                           size.height())
+            painter.drawImage(target, self.image)
+        painter.end()
+
+    # clock, the frame rate is limited by the interval of the timer
+
+    def tick(self, fps_limit=0) -> int:
+        return self._clock.tick()
+
+    def get_fps(self) -> float:
+        return self._clock.get_fps()
+
+    def get_ticks(self) -> int:
+        return pg.time.get_ticks()
+
+    def set_timer(self, event, millis):
+        pg.time.set_timer(event, millis)
+
+    # input
+
+    def get_events(self) -> list:
+        events, self._events = pg.event.get() + self._events, []
+        return events
+
+    def get_pressed(self):
+        return self._pressed
+
+    def get_rel(self) -> tuple:
+        rel, self._rel = self._rel, 0
+        return rel, 0
+
+    def keyPressEvent(self, event):
+        if event.isAutoRepeat():
+            return
+        if event.key() in _movement_keys:
+            self._pressed.codes.add(_movement_keys[event.key()])
+        elif event.key() in _event_keys:
+            self._events.append(pg.event.Event(pg.KEYDOWN, key=_event_keys[event.key()]))
+
+    def keyReleaseEvent(self, event):
+        if not event.isAutoRepeat() and event.key() in _movement_keys:
+            self._pressed.codes.discard(_movement_keys[event.key()])
+
+    def mouseMoveEvent(self, event):
+        # the cursor is kept in the middle of the view, moving it back sends a move event with no movement
+        center = self.rect().center()
+        self._rel += event.x() - center.x()
+        if event.pos() != center:
+            QCursor.setPos(self.mapToGlobal(center))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._events.append(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(event.x(), event.y())))
+
+    def focusOutEvent(self, event):
+        self._pressed.codes.clear()
+
+    def closeEvent(self, event):
+        # closing the window while the game runs quits the game, the view is closed when the loop stops
+        if self.timer.isActive():
+            self._events.append(pg.event.Event(pg.QUIT))
+            event.ignore()
+        else:
+            event.accept()
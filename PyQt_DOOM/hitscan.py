@@ -0,0 +1,34 @@
+class HitScan:
+    """
+    Resolves a shot against the last rendered frame.
+
+    NPCs projected on screen register themselves in RayCasting.npcs_on_screen, the wall depth under the crosshair is
+    taken from the centre column of the ray casting result. The nearest NPC covering the crosshair and standing in
+    front of that wall takes the hit.
+    """
+    def __init__(self, game):
+        self.game = game
+
+    def wall_depth(self):
+        result = self.game.raycasting.ray_casting_result
+        if not result:
+            return float('inf')
+        return result[self.game.settings.HALF_NUM_RAYS][0]
+
+    def query(self):
+        HALF_WIDTH = self.game.settings.HALF_WIDTH
+        wall_depth = self.wall_depth()
+        target = None
+        for npc in self.game.raycasting.npcs_on_screen:
+            if not npc.alive or npc.norm_dist > wall_depth:
+                continue
+            if npc.screen_x - npc.sprite_half_width < HALF_WIDTH < npc.screen_x + npc.sprite_half_width:
+                if target is None or npc.norm_dist < target.norm_dist:
+                    target = npc
+        return target
+
+    def fire(self):
+        target = self.query()
+        if target is not None:
+            target.get_hit(self.game.weapon.damage)
+        return target
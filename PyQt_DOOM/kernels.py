@@ -0,0 +1,284 @@
+import math
+import numpy as np
+from loguru import logger
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# kernels are compiled when numba is installed, the same functions run as plain python otherwise
+JIT = numba is not None
+
+WAYS = np.array([[-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]], np.int64)
+
+
+def _jit(fnc):
+    return numba.njit(cache=True)(fnc) if JIT else fnc
+
+
+@_jit
+def is_wall(grid, x, y):
+    rows, cols = grid.shape
+    return 0 <= x < cols and 0 <= y < rows and grid[y, x] != 0
+
+
+@_jit
+def cast_rays(grid, ox, oy, angle, half_fov, delta_angle, num_rays, max_depth, screen_dist, out):
+    """
+    Grid version of RayCasting.ray_cast, writes depth, projected height, texture and texture offset of every ray to
+    the rows of out.
+    """
+    texture_vert, texture_hor = 1, 1
+    x_map, y_map = int(ox), int(oy)
+
+    ray_angle = angle - half_fov + 0.0001
+    for ray in range(num_rays):
+        sin_a = math.sin(ray_angle)
+        cos_a = math.cos(ray_angle)
+
+        # horizontals
+        if sin_a > 0:
+            y_hor, dy = y_map + 1.0, 1.0
+        else:
+            y_hor, dy = y_map - 1e-6, -1.0
+        depth_hor = (y_hor - oy) / sin_a
+        x_hor = ox + depth_hor * cos_a
+        delta_depth = dy / sin_a
+        dx = delta_depth * cos_a
+        for i in range(max_depth):
+            if is_wall(grid, int(x_hor), int(y_hor)):
+                texture_hor = grid[int(y_hor), int(x_hor)]
+                break
+            x_hor += dx
+            y_hor += dy
+            depth_hor += delta_depth
+
+        # verticals
+        if cos_a > 0:
+            x_vert, dx = x_map + 1.0, 1.0
+        else:
+            x_vert, dx = x_map - 1e-6, -1.0
+        depth_vert = (x_vert - ox) / cos_a
+        y_vert = oy + depth_vert * sin_a
+        delta_depth = dx / cos_a
+        dy = delta_depth * sin_a
+        for i in range(max_depth):
+            if is_wall(grid, int(x_vert), int(y_vert)):
+                texture_vert = grid[int(y_vert), int(x_vert)]
+                break
+            x_vert += dx
+            y_vert += dy
+            depth_vert += delta_depth
+
+        # depth, texture offset
+        if depth_vert < depth_hor:
+            depth, texture = depth_vert, texture_vert
+            y_vert %= 1
+            offset = y_vert if cos_a > 0 else (1 - y_vert)
+        else:
+            depth, texture = depth_hor, texture_hor
+            x_hor %= 1
+            offset = (1 - x_hor) if sin_a > 0 else x_hor
+
+        # remove fishbowl effect
+        depth *= math.cos(angle - ray_angle)
+
+        out[ray, 0] = depth
+        out[ray, 1] = screen_dist / (depth + 0.0001)
+        out[ray, 2] = texture
+        out[ray, 3] = offset
+
+        ray_angle += delta_angle
+
+
+@_jit
+def line_of_sight(grid, ox, oy, ray_angle, npc_x, npc_y, max_depth):
+    """
+    Grid version of NPC.ray_cast_player_npc.
+
+    :param ray_angle:   angle from the player to the npc
+    :param npc_x:       npc map tile
+    """
+    x_map, y_map = int(ox), int(oy)
+    if x_map == npc_x and y_map == npc_y:
+        return True
+
+    wall_dist_v, wall_dist_h = 0.0, 0.0
+    player_dist_v, player_dist_h = 0.0, 0.0
+
+    sin_a = math.sin(ray_angle)
+    cos_a = math.cos(ray_angle)
+
+    # horizontals
+    if sin_a > 0:
+        y_hor, dy = y_map + 1.0, 1.0
+    else:
+        y_hor, dy = y_map - 1e-6, -1.0
+    depth_hor = (y_hor - oy) / sin_a
+    x_hor = ox + depth_hor * cos_a
+    delta_depth = dy / sin_a
+    dx = delta_depth * cos_a
+    for i in range(max_depth):
+        tile_x, tile_y = int(x_hor), int(y_hor)
+        if tile_x == npc_x and tile_y == npc_y:
+            player_dist_h = depth_hor
+            break
+        if is_wall(grid, tile_x, tile_y):
+            wall_dist_h = depth_hor
+            break
+        x_hor += dx
+        y_hor += dy
+        depth_hor += delta_depth
+
+    # verticals
+    if cos_a > 0:
+        x_vert, dx = x_map + 1.0, 1.0
+    else:
+        x_vert, dx = x_map - 1e-6, -1.0
+    depth_vert = (x_vert - ox) / cos_a
+    y_vert = oy + depth_vert * sin_a
+    delta_depth = dx / cos_a
+    dy = delta_depth * sin_a
+    for i in range(max_depth):
+        tile_x, tile_y = int(x_vert), int(y_vert)
+        if tile_x == npc_x and tile_y == npc_y:
+            player_dist_v = depth_vert
+            break
+        if is_wall(grid, tile_x, tile_y):
+            wall_dist_v = depth_vert
+            break
+        x_vert += dx
+        y_vert += dy
+        depth_vert += delta_depth
+
+    player_dist = max(player_dist_v, player_dist_h)
+    wall_dist = max(wall_dist_v, wall_dist_h)
+    return 0 < player_dist < wall_dist or wall_dist == 0
+
+
+@_jit
+def path_step(grid, blocked, start_x, start_y, goal_x, goal_y):
+    """
+    Grid version of PathFinding.get_path, breadth-first search over the free tiles not marked in blocked.
+
+    :return:    next tile on the way from start to goal, the goal itself when it is unreachable
+    """
+    rows, cols = grid.shape
+    parent = np.full(rows * cols, -1, np.int64)
+    queue = np.empty(rows * cols, np.int64)
+    start = start_y * cols + start_x
+    goal = goal_y * cols + goal_x
+    parent[start] = start
+    queue[0] = start
+    head, tail = 0, 1
+    while head < tail:
+        node = queue[head]
+        head += 1
+        if node == goal:
+            break
+        x, y = node % cols, node // cols
+        for i in range(WAYS.shape[0]):
+            next_x, next_y = x + WAYS[i, 0], y + WAYS[i, 1]
+            if next_x < 0 or next_y < 0 or next_x >= cols or next_y >= rows or grid[next_y, next_x] != 0:
+                continue
+            next_node = next_y * cols + next_x
+            if parent[next_node] != -1 or blocked[next_y, next_x]:
+                continue
+            parent[next_node] = node
+            queue[tail] = next_node
+            tail += 1
+
+    if goal == start or parent[goal] == -1:
+        return goal_x, goal_y
+    step = goal
+    while parent[step] != start:
+        step = parent[step]
+    return step % cols, step // cols
+
+
+def blocked_grid(grid, positions):
+    blocked = np.zeros(grid.shape, np.uint8)
+    for x, y in positions:
+        blocked[y, x] = 1
+    return blocked
+
+
+def compile_kernels():
+    """
+    Run every kernel once so numba compiles them, or loads them from its cache, before the first frame.
+    """
+    if not JIT:
+        return
+    grid = np.ones((3, 3), np.uint8)
+    grid[1, 1] = 0
+    cast_rays(grid, 1.5, 1.5, 0.5, 0.5, 0.1, 2, 2, 1.0, np.zeros((2, 4)))
+    line_of_sight(grid, 1.5, 1.5, 0.5, 1, 1, 2)
+    path_step(grid, np.zeros((3, 3), np.uint8), 1, 1, 1, 1)
+    logger.debug("Kernels: compiled with numba")
+
+
+def check_backends(samples=2000, seed=0) -> int:
+    """
+    Compare the kernels with the pure python methods of RayCasting, NPC and PathFinding on the game map from random
+    player and npc positions, results have to be bit-identical.
+
+    :return:    number of mismatching samples
+    """
+    from random import Random
+    from types import SimpleNamespace
+    from PyQt_DOOM.map import Map
+    from PyQt_DOOM.raycasting import RayCasting
+    from PyQt_DOOM.npc import NPC
+    from PyQt_DOOM.pathfinding import PathFinding
+
+    random = Random(seed)
+    level_map = Map(None)
+    grid = level_map.grid
+    free = [(x, y) for y in range(level_map.rows) for x in range(level_map.cols) if not grid[y, x]]
+    settings = SimpleNamespace(HALF_FOV=math.pi / 6, DELTA_ANGLE=math.pi / 3 / 800, NUM_RAYS=800, MAX_DEPTH=20,
+                               SCREEN_DIST=800 / math.tan(math.pi / 6))
+    game = SimpleNamespace(settings=settings, map=level_map, kernels=None,
+                           object_handler=SimpleNamespace(npc_positions=set()))
+    pathfinding = PathFinding(game)
+
+    def position():
+        x, y = random.choice(free)
+        return x + random.random(), y + random.random()
+
+    mismatches = {'ray_cast': 0, 'line_of_sight': 0, 'path_step': 0}
+    out = np.zeros((settings.NUM_RAYS, 4))
+    for i in range(samples):
+        px, py = position()
+        game.player = SimpleNamespace(pos=(px, py), map_pos=(int(px), int(py)), angle=random.uniform(0, math.tau))
+        try:
+            caster = SimpleNamespace(game=game, ray_casting_result=[])
+            RayCasting.ray_cast(caster)
+            cast_rays(grid, px, py, game.player.angle, settings.HALF_FOV, settings.DELTA_ANGLE, settings.NUM_RAYS,
+                      settings.MAX_DEPTH, settings.SCREEN_DIST, out)
+            if caster.ray_casting_result != [(d, p, int(t), o) for d, p, t, o in out.tolist()]:
+                mismatches['ray_cast'] += 1
+        except ZeroDivisionError:
+            pass
+
+        nx, ny = position()
+        npc = SimpleNamespace(game=game, map_pos=(int(nx), int(ny)), theta=math.atan2(ny - py, nx - px))
+        try:
+            if NPC.ray_cast_player_npc(npc) != line_of_sight(grid, px, py, npc.theta, int(nx), int(ny), settings.MAX_DEPTH):
+                mismatches['line_of_sight'] += 1
+        except ZeroDivisionError:
+            pass
+
+        game.object_handler.npc_positions = {random.choice(free) for j in range(random.randrange(20))}
+        reference = PathFinding.get_path.__wrapped__(pathfinding, npc.map_pos, game.player.map_pos)
+        blocked = blocked_grid(grid, game.object_handler.npc_positions)
+        if reference != path_step(grid, blocked, *npc.map_pos, *game.player.map_pos):
+            mismatches['path_step'] += 1
+
+    logger.info(f"Kernels ({'numba' if JIT else 'python'}): {samples} samples, mismatches {mismatches}")
+    return sum(mismatches.values())
+
+
+if __name__ == '__main__':
+    raise SystemExit(1 if check_backends() else 0)
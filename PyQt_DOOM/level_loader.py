@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+from PyQt_DOOM.map import Map
+from PyQt_DOOM.pathfinding import PathFinding
+from PyQt_DOOM.spawn_director import SpawnDirector
+from PyQt_DOOM.object_handler import ObjectHandler
+from PyQt_DOOM.assets import assets
+
+
+class Level:
+    """
+    State of one level that does not depend on the level being played: the map, its pathfinding graph, the free
+    spawn tiles grouped into regions and the decoded images that are not cached yet.
+    """
+    def __init__(self, level_map, graph, regions, images):
+        self.map = level_map
+        self.graph = graph
+        self.regions = regions
+        self.images = images
+
+
+class LevelLoader:
+    """
+    Builds the next level on a background thread while the current one is played, so starting it only swaps in
+    prepared state. Surfaces are converted on the main thread when the level is taken.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='level_loader')
+        self.future = None
+
+    def build(self) -> Level:
+        time_start = time.perf_counter()
+        level_map = Map(self.game)
+        graph = PathFinding.get_graph(level_map)
+        regions = SpawnDirector.get_regions(level_map, ObjectHandler.restricted_area)
+        images = assets.decode(assets.pack_images())
+        logger.debug(f"LevelLoader: level built in {(time.perf_counter() - time_start) * 1000:.1f} ms, "
+                     f"{len(images)} images decoded")
+        return Level(level_map, graph, regions, images)
+
+    def prepare(self):
+        if self.future is None:
+            self.future = self.executor.submit(self.build)
+
+    def take(self) -> Level:
+        """
+        :return:    the prepared level, waiting for the worker if it is not done yet, or a level built right away when
+                    none was prepared
+        """
+        if self.future is None:
+            level = self.build()
+        else:
+            level = self.future.result()
+            self.future = None
+        assets.store(level.images)
+        level.images = []
+        return level
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        # images of a level nobody took may be surfaces over the atlas, which is closed after the loader
+        if self.future is not None and not self.future.cancelled() and self.future.exception() is None:
+            self.future.result().images = []
+        self.future = None
@@ -1,4 +1,5 @@
 import pygame as pg
+import numpy as np
 
 _ = False
 mini_map = [
@@ -38,12 +39,17 @@ mini_map = [
 
 
 class Map:
-    def __init__(self, game):
+    def __init__(self, game, layout=None):
+        """
+        :param layout:  rows of wall textures and False for free tiles, mini_map by default
+        """
         self.game = game
-        self.mini_map = mini_map
+        self.mini_map = mini_map if layout is None else layout
         self.world_map = {}
         self.rows = len(self.mini_map)
         self.cols = len(self.mini_map[0])
+        # dense copy of the map for the kernels, wall texture or 0 for free tiles
+        self.grid = np.zeros((self.rows, self.cols), np.uint8)
         self.get_map()
 
     def get_map(self):
@@ -51,6 +57,7 @@ class Map:
             for i, value in enumerate(row):
                 if value:
                     self.world_map[(i, j)] = value
+                    self.grid[j, i] = value
 
     def draw(self):
         [pg.draw.rect(self.game.screen, 'darkgray', (pos[0] * 100, pos[1] * 100, 100, 100), 2)
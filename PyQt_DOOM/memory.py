@@ -0,0 +1,191 @@
+import pygame as pg
+import tracemalloc
+import types
+import json
+import os
+import gc
+from collections import deque, Counter
+from datetime import datetime
+from loguru import logger
+
+from PyQt_DOOM.app_paths import app_dir
+from PyQt_DOOM.pathfinding import PathFinding
+from PyQt_DOOM.frame_store import frame_store
+from PyQt_DOOM.assets import assets
+
+
+_skip_types = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType, str, bytes)
+
+
+def _children(obj):
+    if isinstance(obj, dict):
+        return [*obj.keys(), *obj.values()]
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        return obj
+    if isinstance(obj, _skip_types):
+        return ()
+    attributes = getattr(obj, '__dict__', None)
+    return attributes.values() if attributes is not None else ()
+
+
+def _surfaces(roots, stop, seen) -> list:
+    """
+    :return:    surfaces reachable from the roots through containers and instance attributes, objects whose id is in
+                stop are not entered and objects whose id is in seen are skipped and added to it
+    """
+    found = []
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, pg.Surface):
+            found.append(obj)
+            continue
+        for child in _children(obj):
+            if id(child) not in seen and id(child) not in stop:
+                seen.add(id(child))
+                stack.append(child)
+    return found
+
+
+def surface_owners(game) -> dict:
+    """
+    Count the surfaces held by every part of the game. Owners are walked in order and a surface belongs to the first
+    owner reaching it, so the cache holds only the surfaces nothing in the running level uses. Subsurfaces share the
+    pixels of their parent and add no bytes.
+
+    :return:    owner: {'surfaces', 'subsurfaces', 'bytes'}
+    """
+    renderer, handler, raycasting = game.object_renderer, game.object_handler, game.raycasting
+    owners = {
+        'walls': (renderer.wall_textures, renderer.wall_mips, raycasting.wall_columns),
+        'hud': (renderer, game.weapon),
+        'npc_frames': (handler.npc_list, handler.npc_pool),
+        'sprites': (handler.sprite_list,),
+        'frame': (raycasting.objects_to_render, game.screen),
+        'cache': (assets, frame_store),
+    }
+    # the game and its parts are reachable from almost every object, only the roots above are entered
+    stop = {id(game), *map(id, vars(game).values())}
+    seen = set()
+    result = {}
+    for owner, roots in owners.items():
+        surfaces = _surfaces([root for root in roots if id(root) not in seen], stop - set(map(id, roots)), seen)
+        seen.update(map(id, surfaces))
+        parents = [surface for surface in surfaces if surface.get_parent() is None]
+        result[owner] = {
+            'surfaces': len(parents),
+            'subsurfaces': len(surfaces) - len(parents),
+            'bytes': sum(surface.get_pitch() * surface.get_height() for surface in parents),
+        }
+    return result
+
+
+def instance_counts() -> dict:
+    """
+    :return:    number of live instances of every class defined in the game package
+    """
+    counts = Counter(type(obj).__qualname__ for obj in gc.get_objects()
+                     if str(type(obj).__module__).startswith('PyQt_DOOM'))
+    return dict(sorted(counts.items()))
+
+
+class MemoryMonitor:
+    """
+    Memory instrumentation mode, enabled by the memory_monitor setting.
+
+    At every level boundary garbage is collected and the monitor records the surfaces and pixel bytes per owner, the
+    live instances of the game classes, the path cache size and a tracemalloc snapshot. The report logs what grew since
+    the previous level, the difference of the snapshots is grouped by the allocating line.
+    """
+    def __init__(self, game, frames=10, top=10, leak_levels=3):
+        """
+        :param frames:      stack frames stored with every traced allocation
+        :param top:         number of the most grown allocating lines stored per level
+        :param leak_levels: a class whose instance count grew at each of this many level starts is reported as a leak
+        """
+        self.game = game
+        self.top = top
+        self.leak_levels = leak_levels
+        self.levels = []
+        self._snapshot = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def level_boundary(self, level):
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        traced, peak = tracemalloc.get_traced_memory()
+        record = {
+            'level': level,
+            'traced_bytes': traced,
+            'peak_bytes': peak,
+            'surfaces': surface_owners(self.game),
+            'instances': instance_counts(),
+            'path_cache': PathFinding.get_path.cache_info().currsize,
+            'growth': [],
+        }
+        if self._snapshot is not None:
+            stats = snapshot.compare_to(self._snapshot, 'lineno')
+            record['growth'] = [{'line': str(stat.traceback[0]), 'size_diff': stat.size_diff,
+                                 'count_diff': stat.count_diff} for stat in stats[:self.top] if stat.size_diff > 0]
+        self._snapshot = snapshot
+        self.levels.append(record)
+        self.report(record)
+        tracemalloc.reset_peak()
+
+    def report(self, record):
+        previous = self.levels[-2] if len(self.levels) > 1 else None
+        surfaces = ', '.join(f"{owner} {stats['surfaces']} ({stats['bytes'] / 2 ** 20:.2f} MiB)"
+                             for owner, stats in record['surfaces'].items())
+        logger.debug(f"MemoryMonitor: level {record['level']}, {record['traced_bytes'] / 2 ** 20:.2f} MiB traced, "
+                     f"peak {record['peak_bytes'] / 2 ** 20:.2f} MiB, path cache {record['path_cache']}, "
+                     f"surfaces: {surfaces}")
+        if previous is None:
+            return
+        # surfaces move between owners, the cache hands npc frames to the level, only growth of the total is a leak
+        growth = {owner: (stats['surfaces'] - previous['surfaces'][owner]['surfaces'],
+                          stats['bytes'] - previous['surfaces'][owner]['bytes'])
+                  for owner, stats in record['surfaces'].items()}
+        total = sum(grown_bytes for grown_surfaces, grown_bytes in growth.values())
+        changes = ', '.join(f"{owner} {grown_surfaces:+d} surfaces {grown_bytes / 2 ** 20:+.2f} MiB"
+                            for owner, (grown_surfaces, grown_bytes) in growth.items() if grown_surfaces or grown_bytes)
+        if total > 0:
+            logger.warning(f"MemoryMonitor: surfaces grew by {total / 2 ** 20:.2f} MiB, {changes}")
+        elif changes:
+            logger.debug(f"MemoryMonitor: surfaces {total / 2 ** 20:+.2f} MiB, {changes}")
+        recent = [level['instances'] for level in self.levels[-self.leak_levels - 1:]]
+        for name, count in record['instances'].items():
+            counts = [instances.get(name, 0) for instances in recent]
+            if len(recent) > self.leak_levels and all(a < b for a, b in zip(counts, counts[1:])):
+                logger.warning(f"MemoryMonitor: {name} instances grew at each of the last {self.leak_levels} levels, "
+                               f"{' -> '.join(map(str, counts))}")
+            elif count > previous['instances'].get(name, 0):
+                logger.debug(f"MemoryMonitor: {count - previous['instances'].get(name, 0)} more {name} instances "
+                             f"alive ({count})")
+        for stat in record['growth']:
+            logger.debug(f"MemoryMonitor: {stat['line']} +{stat['size_diff'] / 1024:.1f} KiB, "
+                         f"{stat['count_diff']:+d} blocks")
+
+    def write(self, folder=None):
+        """
+        Write the records of all levels to a json file named by the current time.
+        """
+        if folder is None:
+            folder = app_dir() / 'memory'
+        if not self.levels:
+            return None
+        if not folder.is_dir():
+            os.makedirs(folder)
+        path = folder / datetime.now().strftime('memory_%Y%m%d_%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump(self.levels, f, indent=4)
+        logger.info(f"MemoryMonitor: {len(self.levels)} levels written to {path}")
+        return path
+
+    def close(self):
+        self.write()
+        tracemalloc.stop()
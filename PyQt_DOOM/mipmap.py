@@ -0,0 +1,35 @@
+import pygame as pg
+
+
+class MipChain:
+    """
+    Image with its mip pyramid. Every level is half the size of the previous one and is filtered with smoothscale, so
+    small projections are scaled down from the nearest level above the target size instead of the full size source.
+    """
+    def __init__(self, image, min_size=4):
+        self.levels = [image]
+        self.width, self.height = width, height = image.get_size()
+        while width // 2 >= min_size and height // 2 >= min_size:
+            width, height = width // 2, height // 2
+            image = pg.transform.smoothscale(image, (width, height))
+            self.levels.append(image)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level_index(self, width, height) -> int:
+        """
+        :return:    index of the smallest level at least as large as the target size, 0 when the target is larger than
+                    the image
+        """
+        ratio = int(min(self.width / max(width, 1), self.height / max(height, 1)))
+        return min(max(ratio.bit_length() - 1, 0), len(self.levels) - 1)
+
+    def select(self, width, height) -> pg.Surface:
+        return self.levels[self.level_index(width, height)]
+
+    def memory_footprint(self) -> int:
+        """
+        :return:    pixel memory of the levels below the full size image in bytes
+        """
+        return sum(img.get_pitch() * img.get_height() for img in self.levels[1:])
@@ -0,0 +1,425 @@
+import math
+import random
+import socket
+import struct
+import time
+from collections import OrderedDict
+from loguru import logger
+
+from PyQt_DOOM.kernels import line_of_sight
+from PyQt_DOOM.event_log import event_log
+
+
+# message types, the first byte of every datagram
+HELLO, ACK, SNAPSHOT, BYE = range(4)
+
+# positions are sent in 1/256 of a tile, angles in 1/65536 of a turn
+POSITION_SCALE = 256
+ANGLE_SCALE = 65536 / math.tau
+KINDS = ('Soldier', 'Caco Demon', 'Cyber Demon')
+# entity flags
+ALIVE, PAIN, SEES_PLAYER = 1, 2, 4
+# view of a client following the player
+NO_VIEW = 0xFFFF
+
+_hello = struct.Struct('<BHH')
+_ack = struct.Struct('<BI')
+# type, tick, base tick (0 for a full snapshot), game time in ms
+_header = struct.Struct('<BIII')
+# x, y, angle, health
+_player = struct.Struct('<HHHB')
+# changed and removed entities
+_counts = struct.Struct('<HH')
+# id, mask of the changed fields
+_entity = struct.Struct('<HB')
+_entity_id = struct.Struct('<H')
+# entity fields: kind, x, y, health, flags, the health of a Cyber Demon starts above 255
+_fields = [struct.Struct(f'<{f}') for f in 'BHHHB']
+
+
+def quantize_position(value) -> int:
+    return max(0, min(0xFFFF, round(value * POSITION_SCALE)))
+
+
+def quantize_angle(angle) -> int:
+    return round(angle % math.tau * ANGLE_SCALE) & 0xFFFF
+
+
+def _byte(value) -> int:
+    return max(0, min(0xFF, int(value)))
+
+
+def _word(value) -> int:
+    return max(0, min(0xFFFF, int(value)))
+
+
+class Snapshot:
+    """
+    Quantized state of one server tick: the player as (x, y, angle, health) and the entities as id: (kind, x, y,
+    health, flags).
+    """
+    __slots__ = ('tick', 'time', 'player', 'entities')
+
+    def __init__(self, tick, time_ms, player, entities):
+        self.tick = tick
+        self.time = time_ms
+        self.player = player
+        self.entities = entities
+
+
+def encode(snapshot, base=None) -> bytes:
+    """
+    :param base:    snapshot the client already has, only entities differing from it are written with the changed
+                    fields and entities missing in the snapshot are listed as removed, all entities are written when
+                    not given
+    """
+    base_entities = base.entities if base is not None else {}
+    changed = []
+    for entity_id, state in snapshot.entities.items():
+        before = base_entities.get(entity_id)
+        if before == state:
+            continue
+        mask = 0
+        values = []
+        for field, value in enumerate(state):
+            if before is None or before[field] != value:
+                mask |= 1 << field
+                values.append(_fields[field].pack(value))
+        changed.append(_entity.pack(entity_id, mask) + b''.join(values))
+    removed = [_entity_id.pack(entity_id) for entity_id in base_entities if entity_id not in snapshot.entities]
+    return b''.join([_header.pack(SNAPSHOT, snapshot.tick, base.tick if base is not None else 0, snapshot.time),
+                     _player.pack(*snapshot.player), _counts.pack(len(changed), len(removed)), *changed, *removed])
+
+
+def decode(data, snapshots):
+    """
+    :param snapshots:   tick: Snapshot received before, the base of the delta is taken from them
+    :return:            the Snapshot, None when its base is not in snapshots
+    """
+    message, tick, base_tick, time_ms = _header.unpack_from(data)
+    offset = _header.size
+    player = _player.unpack_from(data, offset)
+    offset += _player.size
+    changed, removed = _counts.unpack_from(data, offset)
+    offset += _counts.size
+    entities = {}
+    if base_tick:
+        base = snapshots.get(base_tick)
+        if base is None:
+            return None
+        entities.update(base.entities)
+    for i in range(changed):
+        entity_id, mask = _entity.unpack_from(data, offset)
+        offset += _entity.size
+        state = list(entities.get(entity_id, (0,) * len(_fields)))
+        for field, field_struct in enumerate(_fields):
+            if mask & 1 << field:
+                state[field], = field_struct.unpack_from(data, offset)
+                offset += field_struct.size
+        entities[entity_id] = tuple(state)
+    for i in range(removed):
+        entity_id, = _entity_id.unpack_from(data, offset)
+        offset += _entity_id.size
+        entities.pop(entity_id, None)
+    return Snapshot(tick, time_ms, player, entities)
+
+
+class _Client:
+    def __init__(self, view):
+        """
+        :param view:    map position the client sees from, the player position when None
+        """
+        self.view = view
+        # tick: Snapshot sent, the acknowledged one is the base of the next delta
+        self.sent = OrderedDict()
+        self.acked = 0
+
+
+class SnapshotServer:
+    """
+    Server side of the snapshot stream, the game it runs is the authority for the clients.
+
+    Every tick_rate-th of a second of game time the player and the NPCs are captured with quantized positions and
+    every client gets the NPCs in line of sight of its view, encoded as a delta against the last snapshot it
+    acknowledged. Snapshots go over UDP and a lost one is not sent again, the next delta is based on an older
+    acknowledged snapshot or is a full snapshot when the client acknowledged none of the last history ticks.
+    """
+    def __init__(self, game, port=0, tick_rate=20, history=32, loss=0.0):
+        """
+        :param port:    localhost port, a free one when 0
+        :param loss:    part of the snapshots dropped instead of sent, simulates a lossy network
+        """
+        self.game = game
+        # nothing is drawn, sprites are only projected as with the pipelined render
+        game.raycasting.deferred = True
+        self.tick_ms = 1000 / tick_rate
+        self.history = history
+        self.loss = loss
+        # the game random numbers stay the same with and without loss
+        self._random = random.Random(0)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.clients = {}
+        self.tick = 0
+        self._next_time = 0
+        self._ids = {}
+        self._next_id = 0
+        self.snapshots_sent = 0
+        self.bytes_sent = 0
+        self.full_bytes = 0
+        logger.info(f"SnapshotServer: listening on {self.address[0]}:{self.address[1]}, {tick_rate} ticks per second")
+
+    def receive(self):
+        while True:
+            try:
+                data, address = self.socket.recvfrom(64)
+            except BlockingIOError:
+                return
+            except ConnectionResetError:
+                # windows reports an unreachable client on the next read
+                continue
+            if data[0] == HELLO:
+                message, x, y = _hello.unpack(data)
+                view = None if x == NO_VIEW else (x / POSITION_SCALE, y / POSITION_SCALE)
+                if address not in self.clients:
+                    logger.info(f"SnapshotServer: client {address[0]}:{address[1]} connected, view {view}")
+                self.clients[address] = _Client(view)
+            elif data[0] == ACK and address in self.clients:
+                message, tick = _ack.unpack(data)
+                client = self.clients[address]
+                if tick > client.acked and tick in client.sent:
+                    client.acked = tick
+            elif data[0] == BYE and self.clients.pop(address, None) is not None:
+                logger.info(f"SnapshotServer: client {address[0]}:{address[1]} disconnected")
+
+    def capture(self, time_ms) -> Snapshot:
+        """
+        :return:    state of all NPCs, an NPC taken from the pool for a new spawn gets a new id, also when it is spawned
+                    again in the frame it was pooled
+        """
+        ids = {}
+        entities = {}
+        for npc in self.game.object_handler.npc_list:
+            key = npc, npc.generation
+            entity_id = self._ids.get(key)
+            if entity_id is None:
+                entity_id = self._next_id
+                self._next_id = (self._next_id + 1) & 0xFFFF
+            ids[key] = entity_id
+            flags = (ALIVE if npc.alive else 0) | (PAIN if npc.pain else 0) | (SEES_PLAYER if npc.ray_cast_value else 0)
+            entities[entity_id] = (KINDS.index(npc.enemy_type), quantize_position(npc.x), quantize_position(npc.y),
+                                   _word(npc.health), flags)
+        self._ids = ids
+        player = self.game.player
+        return Snapshot(self.tick, time_ms, (quantize_position(player.x), quantize_position(player.y),
+                                             quantize_angle(player.angle), _byte(player.health)), entities)
+
+    def visible(self, entities, view) -> dict:
+        """
+        :return:    the entities whose map tile is in line of sight from the view
+        """
+        grid, max_depth = self.game.map.grid, self.game.settings.MAX_DEPTH
+        view_x, view_y = view
+        result = {}
+        for entity_id, state in entities.items():
+            x, y = state[1] / POSITION_SCALE, state[2] / POSITION_SCALE
+            try:
+                seen = line_of_sight(grid, view_x, view_y, math.atan2(y - view_y, x - view_x), int(x), int(y),
+                                     max_depth)
+            except ZeroDivisionError:
+                seen = True
+            if seen:
+                result[entity_id] = state
+        return result
+
+    def update(self):
+        """
+        Called after every game frame, sends the snapshots when a tick is due.
+        """
+        self.receive()
+        time_now = self.game.get_ticks()
+        if time_now < self._next_time:
+            return
+        # ticks stay on a fixed grid of game time whatever the frame length, more than one tick behind after a level
+        # start or a long frame the grid starts again from now
+        self._next_time += self.tick_ms
+        if self._next_time <= time_now:
+            self._next_time = time_now + self.tick_ms
+        self.tick += 1
+        world = self.capture(time_now)
+        for address, client in self.clients.items():
+            view = client.view if client.view is not None else self.game.player.pos
+            snapshot = Snapshot(world.tick, world.time, world.player, self.visible(world.entities, view))
+            data = encode(snapshot, client.sent.get(client.acked))
+            client.sent[snapshot.tick] = snapshot
+            while len(client.sent) > self.history:
+                client.sent.popitem(last=False)
+            if self._random.random() < self.loss:
+                continue
+            self.full_bytes += len(encode(snapshot))
+            self.socket.sendto(data, address)
+            self.snapshots_sent += 1
+            self.bytes_sent += len(data)
+
+    def close(self):
+        if self.snapshots_sent:
+            logger.info(f"SnapshotServer: {self.tick} ticks, {self.snapshots_sent} snapshots, "
+                        f"{self.bytes_sent / self.snapshots_sent:.1f} bytes per snapshot, "
+                        f"{self.bytes_sent / self.full_bytes:.0%} of the full snapshots")
+        self.socket.close()
+
+
+class SnapshotClient:
+    """
+    Client of a SnapshotServer.
+
+    Snapshots are decoded against the copy of their base kept by the client and acknowledged. The client shows the
+    world interpolation_ms behind the newest snapshot, so that time usually lies between two received snapshots and
+    positions are interpolated between them, when it does not the newest snapshot is held.
+    """
+    def __init__(self, server_address, view=None, interpolation_ms=100, history=32, clock=None):
+        """
+        :param view:    map position the client sees from, the player position when None
+        :param clock:   returns the client time in ms, the render time advances with it between snapshots
+        """
+        self.server_address = server_address
+        self.view = view
+        self.interpolation_ms = interpolation_ms
+        self.history = history
+        self.clock = clock if clock is not None else lambda: time.perf_counter() * 1000
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.snapshots = OrderedDict()
+        self.latest = None
+        self._latest_clock = 0
+        self.received = 0
+        self.bytes_received = 0
+        self.undecodable = 0
+        self.interpolated = 0
+        self.held = 0
+        self.hello()
+
+    def hello(self):
+        x, y = (quantize_position(self.view[0]), quantize_position(self.view[1])) if self.view else (NO_VIEW, NO_VIEW)
+        self.socket.sendto(_hello.pack(HELLO, x, y), self.server_address)
+
+    def receive(self) -> int:
+        """
+        :return:    number of new snapshots
+        """
+        count = 0
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                continue
+            if data[0] != SNAPSHOT:
+                continue
+            self.bytes_received += len(data)
+            snapshot = decode(data, self.snapshots)
+            if snapshot is None:
+                self.undecodable += 1
+                continue
+            if self.latest is not None and snapshot.tick <= self.latest.tick:
+                continue
+            self.snapshots[snapshot.tick] = snapshot
+            while len(self.snapshots) > self.history:
+                self.snapshots.popitem(last=False)
+            self.latest = snapshot
+            self._latest_clock = self.clock()
+            self.socket.sendto(_ack.pack(ACK, snapshot.tick), self.server_address)
+            count += 1
+        self.received += count
+        return count
+
+    def render_time(self) -> float:
+        return self.latest.time + self.clock() - self._latest_clock - self.interpolation_ms
+
+    def interpolate(self, render_time=None):
+        """
+        :return:    player (x, y, angle, health) and id: (kind, x, y, health, flags) of the visible entities at the
+                    render time, positions in tiles, None before the first snapshot
+        """
+        if self.latest is None:
+            return None
+        if render_time is None:
+            render_time = self.render_time()
+        before = after = None
+        for snapshot in self.snapshots.values():
+            if snapshot.time <= render_time:
+                before = snapshot
+            else:
+                after = snapshot
+                break
+        if before is None or after is None:
+            self.held += 1
+            snapshot = before or after
+            return _player_state(snapshot.player), {entity_id: _entity_state(state)
+                                                    for entity_id, state in snapshot.entities.items()}
+        self.interpolated += 1
+        t = (render_time - before.time) / (after.time - before.time)
+        player = _player_state(after.player)
+        x0, y0, angle0, health0 = _player_state(before.player)
+        turn = (player[2] - angle0 + math.pi) % math.tau - math.pi
+        player = x0 + (player[0] - x0) * t, y0 + (player[1] - y0) * t, (angle0 + turn * t) % math.tau, player[3]
+        entities = {}
+        for entity_id, state in after.entities.items():
+            kind, x, y, health, flags = _entity_state(state)
+            previous = before.entities.get(entity_id)
+            if previous is not None:
+                x = previous[1] / POSITION_SCALE + (x - previous[1] / POSITION_SCALE) * t
+                y = previous[2] / POSITION_SCALE + (y - previous[2] / POSITION_SCALE) * t
+            entities[entity_id] = kind, x, y, health, flags
+        return player, entities
+
+    def close(self):
+        self.socket.sendto(bytes([BYE]), self.server_address)
+        self.socket.close()
+
+
+def _player_state(player) -> tuple:
+    x, y, angle, health = player
+    return x / POSITION_SCALE, y / POSITION_SCALE, angle / ANGLE_SCALE, health
+
+
+def _entity_state(state) -> tuple:
+    kind, x, y, health, flags = state
+    return KINDS[kind], x / POSITION_SCALE, y / POSITION_SCALE, health, flags
+
+
+def run_server(game, server, realtime=False, end_frame=None):
+    """
+    Headless game loop of the server: events and the simulation run every frame, nothing is drawn or shown.
+
+    :param realtime:    keep the game clock with the wall clock, a game with a simulated clock runs as fast as it can
+                        otherwise
+    :param end_frame:   called after every frame
+    """
+    event_log.start()
+    time_start, ticks_start = time.perf_counter(), game.get_ticks()
+    try:
+        while game.running:
+            game.profiler.begin_frame()
+            game.check_events()
+            if game.transition is None:
+                game.simulate()
+            else:
+                game.end_transition()
+            game.delta_time = game.clock.tick(game.settings.fps_limit)
+            game.profiler.end_frame()
+            server.update()
+            if end_frame is not None:
+                end_frame()
+            if realtime:
+                time.sleep(max(0.0, time_start + (game.get_ticks() - ticks_start) / 1000 - time.perf_counter()))
+    except Exception:
+        logger.exception("Server loop failed")
+    finally:
+        server.close()
+        game.shutdown()
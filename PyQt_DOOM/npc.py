@@ -1,12 +1,14 @@
 from PyQt_DOOM.sprite_object import *
 from random import randint, random
+from time import perf_counter
+
+from PyQt_DOOM.profiler import PATHFINDING
 
 
 class NPC(AnimatedSprite):
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'soldier' / '0.png'), pos=(10.5, 5.5),
-                 scale=0.6, shift=0.38, animation_time=180, enemy_type: str = ''):
-        if not game.settings.original_pack and path == str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'soldier' / '0.png'):
-            path = str(pl.Path(__file__).parent / 'resources_alt' / 'sprites' / 'npc' / 'soldier' / '0.png')
+    def __init__(self, game, path=None, pos=(10.5, 5.5), scale=0.6, shift=0.38, animation_time=180, enemy_type: str = ''):
+        if path is None:
+            path = assets.path('sprites', 'npc', 'soldier', '0.png')
 
         super().__init__(game, path, pos, scale, shift, animation_time, enemy_type)
         self.attack_images = self.get_images(self.path + '/attack')
@@ -14,10 +16,16 @@ class NPC(AnimatedSprite):
         self.idle_images = self.get_images(self.path + '/idle')
         self.pain_images = self.get_images(self.path + '/pain')
         self.walk_images = self.get_images(self.path + '/walk')
+        self.size = 20
+        # counted up by every reset, an NPC taken from the pool is a new spawn
+        self.generation = 0
+        self.reset()
 
+    def reset(self, pos=None):
+        super().reset(pos)
+        self.generation += 1
         self.attack_dist = randint(3, 6)
         self.speed = 0.03
-        self.size = 20
         self.health = 100
         self.attack_damage = 10
         self.accuracy = 0.15
@@ -42,8 +50,18 @@ class NPC(AnimatedSprite):
         if self.check_wall(int(self.x), int(self.y + dy * self.size)):
             self.y += dy
 
+    def ai_result(self):
+        if self.game.ai_workers is not None:
+            return self.game.ai_workers.result(self)
+
     def movement(self):
-        next_pos = self.game.pathfinding.get_path(self.map_pos, self.game.player.map_pos)
+        result = self.ai_result()
+        if result is not None and result[1] == self.map_pos:
+            next_pos = result[2]
+        else:
+            time_start = perf_counter()
+            next_pos = self.game.pathfinding.get_path(self.map_pos, self.game.player.map_pos)
+            self.game.profiler.lap(PATHFINDING, time_start)
         next_x, next_y = next_pos
 
         # pg.draw.rect(self.game.screen, 'blue', (100 * next_x, 100 * next_y, 100, 100))
@@ -55,45 +73,45 @@ class NPC(AnimatedSprite):
 
     def attack(self):
         if self.animation_trigger:
-            self.game.sound.npc_shot.play()
+            self.game.sound.npc_shot.play(self.dist)
             if random() < self.accuracy:
                 self.game.player.get_damage(self.attack_damage)
 
     def animate_death(self):
         if not self.alive:
             if self.game.global_trigger and self.frame_counter < len(self.death_images) - 1:
-                self.death_images.rotate(-1)
-                self.image = self.death_images[0]
                 self.frame_counter += 1
+                self.image = self.death_images[self.frame_counter]
 
     def animate_pain(self):
         self.animate(self.pain_images)
         if self.animation_trigger:
             self.pain = False
 
-    def check_hit_in_npc(self):
-        HALF_WIDTH = self.game.settings.HALF_WIDTH
-        if self.ray_cast_value and self.game.player.shot:
-            if HALF_WIDTH - self.sprite_half_width < self.screen_x < HALF_WIDTH + self.sprite_half_width:
-                if self.enemy_type == 'Soldier':
-                    self.game.sound.npc_pain.play()
-                else:
-                    self.game.sound.npc_pain2.play()
-                self.game.player.shot = False
-                self.pain = True
-                self.health -= self.game.weapon.damage
-                self.check_health()
+    def get_hit(self, damage):
+        if self.enemy_type == 'Soldier':
+            self.game.sound.npc_pain.play(self.dist)
+        else:
+            self.game.sound.npc_pain2.play(self.dist)
+        self.pain = True
+        self.health -= damage
+        self.check_health()
+
+    def get_sprite_projection(self):
+        super().get_sprite_projection()
+        if self.alive:
+            self.game.raycasting.npcs_on_screen.append(self)
 
     def check_health(self):
         if self.health < 1:
             self.alive = False
-            self.game.sound.npc_death.play()
+            self.game.sound.npc_death.play(self.dist)
             self.game.score_plus(self.enemy_type)
 
     def run_logic(self):
         if self.alive:
-            self.ray_cast_value = self.ray_cast_player_npc()
-            self.check_hit_in_npc()
+            result = self.ai_result()
+            self.ray_cast_value = result[0] if result is not None else self.ray_cast_player_npc()
 
             if self.pain:
                 self.animate_pain()
@@ -125,6 +143,10 @@ class NPC(AnimatedSprite):
         if self.game.player.map_pos == self.map_pos:
             return True
 
+        if self.game.kernels is not None:
+            return self.game.kernels.line_of_sight(self.game.map.grid, *self.game.player.pos, self.theta, *self.map_pos,
+                                                   self.game.settings.MAX_DEPTH)
+
         wall_dist_v, wall_dist_h = 0, 0
         player_dist_v, player_dist_h = 0, 0
 
@@ -195,19 +217,20 @@ class NPC(AnimatedSprite):
 
 
 class SoldierNPC(NPC):
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'soldier' / '0.png'), pos=(10.5, 5.5),
-                 scale=0.6, shift=0.38, animation_time=180, enemy_type: str = 'Soldier'):
-        if not game.settings.original_pack and path == str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'soldier' / '0.png'):
-            path = str(pl.Path(__file__).parent / 'resources_alt' / 'sprites' / 'npc' / 'soldier' / '0.png')
+    def __init__(self, game, path=None, pos=(10.5, 5.5), scale=0.6, shift=0.38, animation_time=180, enemy_type: str = 'Soldier'):
+        if path is None:
+            path = assets.path('sprites', 'npc', 'soldier', '0.png')
         super().__init__(game, path, pos, scale, shift, animation_time, enemy_type)
 
 
 class CacoDemonNPC(NPC):
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'caco_demon' / '0.png'), pos=(10.5, 6.5),
-                 scale=0.7, shift=0.27, animation_time=250, enemy_type='Caco Demon'):
-        if not game.settings.original_pack and path == str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'npc' / 'caco_demon' / '0.png'):
-            path = str(pl.Path(__file__).parent / 'resources_alt' / 'sprites' / 'npc' / 'caco_demon' / '0.png')
+    def __init__(self, game, path=None, pos=(10.5, 6.5), scale=0.7, shift=0.27, animation_time=250, enemy_type='Caco Demon'):
+        if path is None:
+            path = assets.path('sprites', 'npc', 'caco_demon', '0.png')
         super().__init__(game, path, pos, scale, shift, animation_time, enemy_type)
+
+    def reset(self, pos=None):
+        super().reset(pos)
         self.attack_dist = 1.0
         self.health = 150
         self.attack_damage = 25
@@ -216,11 +239,13 @@ class CacoDemonNPC(NPC):
 
 
 class CyberDemonNPC(NPC):
-    def __init__(self, game, path=pl.Path(__file__).parent / 'resources'/'sprites'/'npc'/'cyber_demon'/'0.png', pos=(11.5, 6.0),
-                 scale=1.0, shift=0.04, animation_time=210, enemy_type='Cyber Demon'):
-        if not game.settings.original_pack and path == pl.Path(__file__).parent / 'resources'/'sprites'/'npc'/'cyber_demon'/'0.png':
-            path = pl.Path(__file__).parent / 'resources_alt'/'sprites'/'npc'/'cyber_demon'/'0.png'
+    def __init__(self, game, path=None, pos=(11.5, 6.0), scale=1.0, shift=0.04, animation_time=210, enemy_type='Cyber Demon'):
+        if path is None:
+            path = assets.path('sprites', 'npc', 'cyber_demon', '0.png')
         super().__init__(game, path, pos, scale, shift, animation_time, enemy_type)
+
+    def reset(self, pos=None):
+        super().reset(pos)
         self.attack_dist = 6
         self.health = 350
         self.attack_damage = 15
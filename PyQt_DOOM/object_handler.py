@@ -1,21 +1,21 @@
 from PyQt_DOOM.npc import *
-from random import choices, randrange
+from time import perf_counter
+from PyQt_DOOM.spawn_director import SpawnDirector
+from PyQt_DOOM.profiler import SPRITES, NPC_AI, PATHFINDING
 
 
 class ObjectHandler:
-    def __init__(self, game):
+    restricted_area = {(i, j) for i in range(10) for j in range(10)}
+
+    def __init__(self, game, regions=None):
         self.game = game
         self.sprite_list = []
         self.npc_list = []
+        self.npc_pool = {}
 
-        if self.game.settings.original_pack:
-            resources = 'resources'
-        else:
-            resources = 'resources_alt'
-
-        self.npc_sprite_path = str(pl.Path(__file__).parent / resources / "sprites" / 'npc')
-        self.static_sprite_path = str(pl.Path(__file__).parent / resources / "sprites" / "static_sprites")
-        self.anim_sprite_path = str(pl.Path(__file__).parent / resources /'sprites'/'animated_sprites')
+        self.npc_sprite_path = assets.path('sprites', 'npc')
+        self.static_sprite_path = assets.path('sprites', 'static_sprites')
+        self.anim_sprite_path = assets.path('sprites', 'animated_sprites')
         add_sprite = self.add_sprite
         add_npc = self.add_npc
         self.npc_positions = {}
@@ -24,8 +24,7 @@ class ObjectHandler:
         self.enemies = 20  # npc count
         self.npc_types = [SoldierNPC, CacoDemonNPC, CyberDemonNPC]
         self.weights = [70, 20, 10]
-        self.restricted_area = {(i, j) for i in range(10) for j in range(10)}
-        self.spawn_npc()
+        self.spawn_director = SpawnDirector(self, regions=regions)
 
         # sprite map
         add_sprite(AnimatedSprite(game))
@@ -50,6 +49,7 @@ class ObjectHandler:
         add_sprite(AnimatedSprite(game, pos=(14.5, 30.5)))
         add_sprite(AnimatedSprite(game, pos=(1.5, 30.5)))
         add_sprite(AnimatedSprite(game, pos=(1.5, 24.5)))
+        frame_store.report()
 
         # npc map
         # add_npc(SoldierNPC(game, pos=(11.0, 19.0)))
@@ -61,27 +61,40 @@ class ObjectHandler:
         # add_npc(CacoDemonNPC(game, pos=(5.5, 16.5)))
         # add_npc(CyberDemonNPC(game, pos=(14.5, 25.5)))
 
-    def spawn_npc(self):
-        for i in range(self.enemies):
-                npc = choices(self.npc_types, self.weights)[0]
-                pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
-                while (pos in self.game.map.world_map) or (pos in self.restricted_area):
-                    pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
-                self.add_npc(npc(self.game, pos=(x + 0.5, y + 0.5)))
+    def get_npc(self, npc_type, pos):
+        pool = self.npc_pool.get(npc_type)
+        if pool:
+            npc = pool.pop()
+            npc.reset(pos)
+            return npc
+        return npc_type(self.game, pos=pos)
+
+    def reset(self, regions=None):
+        for npc in self.npc_list:
+            self.npc_pool.setdefault(type(npc), []).append(npc)
+        self.npc_list = []
+        self.npc_positions = {}
+        [sprite.reset() for sprite in self.sprite_list]
+        self.spawn_director.reset(regions)
 
     def check_win(self):
-        if not len(self.npc_positions):
+        if not len(self.npc_positions) and self.spawn_director.finished and self.game.transition is None:
             self.game.sound.victory.play()
-            self.game.object_renderer.win()
-            pg.display.flip()
-            pg.time.delay(1500)
             self.game.score_plus("Level Finished")
-            self.game.new_game(reset_score=False)
+            self.game.end_level(self.game.object_renderer.win, reset_score=False)
 
     def update(self):
+        profiler = self.game.profiler
+        time_start = perf_counter()
+        self.spawn_director.update()
         self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
+        time_start = profiler.lap(NPC_AI, time_start)
         [sprite.update() for sprite in self.sprite_list]
+        time_start = profiler.lap(SPRITES, time_start)
+        # pathfinding is timed inside the npc updates, the rest of the npc time is AI
+        pathfinding_time = profiler.frame[PATHFINDING]
         [npc.update() for npc in self.npc_list]
+        profiler.lap(NPC_AI, time_start + profiler.frame[PATHFINDING] - pathfinding_time)
         self.check_win()
 
     def add_npc(self, npc):
@@ -1,6 +1,11 @@
 import pygame as pg
-import pathlib as pl
-from loguru import logger
+
+from PyQt_DOOM.assets import assets
+from PyQt_DOOM.event_log import event_log, EventType, DEBUG, INFO
+
+
+SCORE_EVENT = EventType('score', INFO, "Score is {}")
+SCORE_DIGIT_EVENT = EventType('score_digit', DEBUG, "Char '{}' no position ({}, 0)")
 
 
 class ObjectRenderer:
@@ -9,25 +14,33 @@ class ObjectRenderer:
         self.game = game
         self.screen = game.screen
         self.wall_textures = self.load_wall_textures()
-        if self.game.settings.original_pack:
-            resources = 'resources'
-        else:
-            resources = 'resources_alt'
-        self.sky_image = self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / 'sky.png'), (s.resolution[0], s.HALF_HEIGHT))
+        self.wall_mips = {texture: assets.mipmap(image) for texture, image in self.wall_textures.items()}
+        self.sky_image = self.get_texture(assets.path('textures', 'sky.png'), (s.resolution[0], s.HALF_HEIGHT))
         self.last_score = None
+        self.damage = False
         self.sky_offset = 0
-        self.blood_screen = self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / 'blood_screen.png'), s.resolution)
+        self.blood_screen = self.get_texture(assets.path('textures', 'blood_screen.png'), s.resolution)
         self.digit_size = 90
-        self.digit_images = [self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / 'digits' / f'{i}.png'), [self.digit_size] * 2) for i in range(11)]
+        self.digit_images = [self.get_texture(assets.path('textures', 'digits', f'{i}.png'), [self.digit_size] * 2) for i in range(11)]
         self.digits = dict(zip(map(str, range(11)), self.digit_images))
-        self.game_over_image = self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / 'game_over.png'), s.resolution)
-        self.win_image = self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / 'win.png'), s.resolution)
+        self.game_over_image = self.get_texture(assets.path('textures', 'game_over.png'), s.resolution)
+        self.win_image = self.get_texture(assets.path('textures', 'win.png'), s.resolution)
 
     def draw(self):
-        self.draw_background()
-        self.render_game_objects()
-        self.draw_player_health()
-        self.draw_score()
+        self.draw_frame(self.game.player.rel, self.game.raycasting.objects_to_render, self.game.player.health,
+                        self.game.get_score(), self.damage)
+        self.damage = False
+
+    def draw_frame(self, rel, objects, health, score, damage):
+        """
+        Draw a frame from the given state only, the render thread of the pipelined loop draws snapshots with it.
+        """
+        self.draw_background(rel)
+        self.render_game_objects(objects)
+        self.draw_player_health(health)
+        self.draw_score(score)
+        if damage:
+            self.screen.blit(self.blood_screen, (0, 0))
 
     def win(self):
         self.screen.blit(self.win_image, (0, 0))
@@ -35,59 +48,55 @@ class ObjectRenderer:
     def game_over(self):
         self.screen.blit(self.game_over_image, (0, 0))
 
-    def draw_player_health(self):
-        health = str(self.game.player.health)
+    def draw_player_health(self, health):
+        health = str(health)
         for i, char in enumerate(health):
             self.screen.blit(self.digits[char], (i * self.digit_size, 0))
         self.screen.blit(self.digits['10'], ((i + 1) * self.digit_size, 0))
 
-    def draw_score(self):
+    def draw_score(self, score):
         WIDTH = self.game.settings.resolution[0]
-        score = str(self.game.get_score())
-        if self.last_score != score:
-            logger.info(f"Score is {score}")
+        score = str(score)
+        changed = self.last_score != score
+        if changed:
+            event_log.log(SCORE_EVENT, score)
         for i, char in enumerate(score):
-            if self.last_score != score:
-                logger.debug(f"Char '{char}' no position ({WIDTH - (len(score) - i)*self.digit_size}, 0)")
-            self.screen.blit(self.digits[char], (WIDTH-(len(score) - i)*self.digit_size, 0))
+            x = WIDTH - (len(score) - i) * self.digit_size
+            if changed:
+                event_log.log(SCORE_DIGIT_EVENT, char, x)
+            self.screen.blit(self.digits[char], (x, 0))
         self.last_score = score
 
     def player_damage(self):
-        self.screen.blit(self.blood_screen, (0, 0))
+        # the blood screen is drawn over the next frame
+        self.damage = True
 
-    def draw_background(self):
+    def draw_background(self, rel):
         s = self.game.settings
         WIDTH, HEIGHT = s.resolution
-        self.sky_offset = (self.sky_offset + 4.5 * self.game.player.rel) % WIDTH
+        self.sky_offset = (self.sky_offset + 4.5 * rel) % WIDTH
         self.screen.blit(self.sky_image, (-self.sky_offset, 0))
         self.screen.blit(self.sky_image, (-self.sky_offset + WIDTH, 0))
         # floor
         pg.draw.rect(self.screen, s.FLOOR_COLOR, (0, s.HALF_HEIGHT, WIDTH, HEIGHT))
 
-    def render_game_objects(self):
-        list_objects = sorted(self.game.raycasting.objects_to_render, key=lambda t: t[0], reverse=True)
+    def render_game_objects(self, objects):
+        list_objects = sorted(objects, key=lambda t: t[0], reverse=True)
         for depth, image, pos in list_objects:
             self.screen.blit(image, pos)
 
     @staticmethod
     def get_texture(path, res):
-        texture = pg.image.load(path).convert_alpha()
-        return pg.transform.scale(texture, res)
+        return assets.scaled(path, res)
 
     def load_wall_textures(self):
-        import pathlib as pl
-        if self.game.settings.original_pack:
-            resources = 'resources'
-        else:
-            resources = 'resources_alt'
-
         res = (self.game.settings.TEXTURE_SIZE, self.game.settings.TEXTURE_SIZE)
 
         return {
-            1: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '1.png'), res),
-            2: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '2.png'), res),
-            3: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '3.png'), res),
-            4: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '4.png'), res),
-            5: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '5.png'), res),
-            6: self.get_texture(str(pl.Path(__file__).parent / resources / 'textures' / '6.png'), res),
+            1: self.get_texture(assets.path('textures', '1.png'), res),
+            2: self.get_texture(assets.path('textures', '2.png'), res),
+            3: self.get_texture(assets.path('textures', '3.png'), res),
+            4: self.get_texture(assets.path('textures', '4.png'), res),
+            5: self.get_texture(assets.path('textures', '5.png'), res),
+            6: self.get_texture(assets.path('textures', '6.png'), res),
         }
\ No newline at end of file
@@ -3,15 +3,25 @@ from functools import lru_cache
 
 
 class PathFinding:
-    def __init__(self, game):
+    ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
+    # nodes taken from the queue by all searches of the python version
+    expansions = 0
+
+    def __init__(self, game, graph=None):
+        """
+        :param graph:   graph prepared by get_graph, built from the game map when not given
+        """
         self.game = game
         self.map = game.map.mini_map
-        self.ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
-        self.graph = {}
-        self.get_graph()
+        self.graph = graph if graph is not None else self.get_graph(game.map)
 
     @lru_cache
     def get_path(self, start, goal):
+        if self.game.kernels is not None:
+            grid = self.game.map.grid
+            blocked = self.game.kernels.blocked_grid(grid, self.game.object_handler.npc_positions)
+            x, y = self.game.kernels.path_step(grid, blocked, *start, *goal)
+            return int(x), int(y)
         self.visited = self.bfs(start, goal, self.graph)
         path = [goal]
         step = self.visited.get(goal, start)
@@ -35,13 +45,19 @@ class PathFinding:
                 if next_node not in visited and next_node not in self.game.object_handler.npc_positions:
                     queue.append(next_node)
                     visited[next_node] = cur_node
+        # every visited node was taken from the queue except the ones still in it
+        PathFinding.expansions += len(visited) - len(queue)
         return visited
 
-    def get_next_nodes(self, x, y):
-        return [(x + dx, y + dy) for dx, dy in self.ways if (x + dx, y + dy) not in self.game.map.world_map]
+    @classmethod
+    def get_next_nodes(cls, world_map, x, y):
+        return [(x + dx, y + dy) for dx, dy in cls.ways if (x + dx, y + dy) not in world_map]
 
-    def get_graph(self):
-        for y, row in enumerate(self.map):
+    @classmethod
+    def get_graph(cls, level_map) -> dict:
+        graph = {}
+        for y, row in enumerate(level_map.mini_map):
             for x, col in enumerate(row):
                 if not col:
-                    self.graph[(x, y)] = self.graph.get((x, y), []) + self.get_next_nodes(x, y)
\ No newline at end of file
+                    graph[(x, y)] = graph.get((x, y), []) + cls.get_next_nodes(level_map.world_map, x, y)
+        return graph
\ No newline at end of file
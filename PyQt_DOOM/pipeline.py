@@ -0,0 +1,131 @@
+import pygame as pg
+import threading
+from time import perf_counter
+
+from PyQt_DOOM.profiler import OBJECTS_TO_RENDER, DRAW, RENDER_WAIT
+
+
+class FrameSnapshot:
+    """
+    Everything the render thread needs to draw one simulated frame. The lists are handed over by the simulation, which
+    starts new ones for the next frame, and surfaces referenced by the snapshot are only read.
+    """
+    __slots__ = ('transition', 'ray_casting_result', 'sprite_projections', 'player_rel', 'health', 'score', 'damage',
+                 'weapon_frame')
+
+    def __init__(self):
+        self.transition = None
+        self.ray_casting_result = []
+        self.sprite_projections = []
+        self.player_rel = 0
+        self.health = 0
+        self.score = 0
+        self.damage = False
+        self.weapon_frame = 0
+
+    def capture(self, game):
+        self.transition = game.transition[0] if game.transition is not None else None
+        self.ray_casting_result = game.raycasting.ray_casting_result
+        self.sprite_projections = game.raycasting.sprite_projections
+        self.player_rel = game.player.rel
+        self.health = game.player.health
+        self.score = game.get_score()
+        self.damage = game.object_renderer.damage
+        game.object_renderer.damage = False
+        self.weapon_frame = game.weapon.frame_counter
+
+
+class RenderPipeline:
+    """
+    Game loop running the simulation of frame N + 1 on the main thread while a render thread draws frame N.
+
+    The simulation projects sprites without scaling them and the render thread scales walls and sprites, draws the
+    frame and the overlay. Two snapshots are used in turns: the main thread captures into one while the render thread
+    reads the other, then waits for the render thread, shows its frame and hands over the new snapshot. The display is
+    flipped, events are read and levels are started on the main thread only, while the render thread is idle.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.snapshots = FrameSnapshot(), FrameSnapshot()
+        self.frame = 0
+        self.render_times = [0.0, 0.0]
+        self._snapshot = None
+        self._error = None
+        self._pending = False
+        self._submitted = threading.Semaphore(0)
+        self._rendered = threading.Semaphore(0)
+        self._thread = threading.Thread(target=self._run, name='render', daemon=True)
+        self._thread.start()
+
+    def step(self):
+        game = self.game
+        game.check_events()
+        if game.transition is None:
+            game.simulate()
+        snapshot = self.snapshots[self.frame % 2]
+        snapshot.capture(game)
+        self.wait()
+        game.present()
+        if game.transition is not None:
+            game.end_transition()
+        self.submit(snapshot)
+        self.frame += 1
+
+    def wait(self):
+        """
+        Wait until the previous snapshot is drawn and add its render times to the current frame.
+        """
+        if not self._pending:
+            return
+        profiler = self.game.profiler
+        time_start = perf_counter()
+        self._rendered.acquire()
+        self._pending = False
+        profiler.lap(RENDER_WAIT, time_start)
+        profiler.frame[OBJECTS_TO_RENDER] += self.render_times[0]
+        profiler.frame[DRAW] += self.render_times[1]
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, snapshot):
+        self._snapshot = snapshot
+        self._pending = snapshot is not None
+        self._submitted.release()
+
+    def render(self, snapshot):
+        game = self.game
+        time_start = perf_counter()
+        objects = []
+        if snapshot.transition is None:
+            objects = game.raycasting.wall_objects(snapshot.ray_casting_result)
+            objects += [(depth, pg.transform.scale(image, size), pos)
+                        for depth, image, size, pos in snapshot.sprite_projections]
+        time_objects = perf_counter()
+        if snapshot.transition is not None:
+            snapshot.transition()
+        else:
+            game.object_renderer.draw_frame(snapshot.player_rel, objects, snapshot.health, snapshot.score,
+                                            snapshot.damage)
+            game.weapon.draw_frame(snapshot.weapon_frame)
+        game.profiler.draw_overlay(game.screen)
+        self.render_times = [time_objects - time_start, perf_counter() - time_objects]
+
+    def _run(self):
+        while True:
+            self._submitted.acquire()
+            snapshot = self._snapshot
+            if snapshot is None:
+                break
+            try:
+                self.render(snapshot)
+            except Exception as e:
+                self._error = e
+            self._rendered.release()
+
+    def close(self):
+        if self._pending:
+            self._rendered.acquire()
+            self._pending = False
+        self.submit(None)
+        self._thread.join()
@@ -12,7 +12,7 @@ class Player:
         self.health = s.PLAYER_MAX_HEALTH
         self.rel = 0
         self.health_recovery_delay = 700
-        self.time_prev = pg.time.get_ticks()
+        self.time_prev = self.game.get_ticks()
         # diagonal movement correction
         self.diag_move_corr = 1 / math.sqrt(2)
 
@@ -21,19 +21,16 @@ class Player:
             self.health += 1
 
     def check_health_recovery_delay(self):
-        time_now = pg.time.get_ticks()
+        time_now = self.game.get_ticks()
         if time_now - self.time_prev > self.health_recovery_delay:
             self.time_prev = time_now
             return True
 
     def check_game_over(self):
-        if self.health < 1:
+        if self.health < 1 and self.game.transition is None:
             self.game.sound.lose.play()
-            self.game.object_renderer.game_over()
-            pg.display.flip()
-            pg.time.delay(1500)
             self.game.finished_fnc()
-            self.game.new_game()
+            self.game.end_level(self.game.object_renderer.game_over, reset_score=True)
 
     def get_damage(self, damage):
         self.health -= damage
@@ -47,6 +44,7 @@ class Player:
                 self.game.sound.shotgun.play()
                 self.shot = True
                 self.game.weapon.reloading = True
+                self.game.hitscan.fire()
 
     def movement(self):
         sin_a = math.sin(self.angle)
@@ -56,7 +54,7 @@ class Player:
         speed_sin = speed * sin_a
         speed_cos = speed * cos_a
 
-        keys = pg.key.get_pressed()
+        keys = self.game.get_pressed()
         num_key_pressed = -1
         if keys[pg.K_w]:
             num_key_pressed += 1
@@ -107,10 +105,11 @@ class Player:
 
     def mouse_control(self):
         s = self.game.settings
-        mx, my = pg.mouse.get_pos()
-        if mx < s.MOUSE_BORDER_LEFT or mx > s.MOUSE_BORDER_RIGHT:
-            pg.mouse.set_pos([s.HALF_WIDTH, s.HALF_HEIGHT])
-        self.rel = pg.mouse.get_rel()[0]
+        if self.game.host is None:
+            mx, my = pg.mouse.get_pos()
+            if mx < s.MOUSE_BORDER_LEFT or mx > s.MOUSE_BORDER_RIGHT:
+                pg.mouse.set_pos([s.HALF_WIDTH, s.HALF_HEIGHT])
+        self.rel = self.game.get_rel()[0]
         self.rel = max(-s.MOUSE_MAX_REL, min(s.MOUSE_MAX_REL, self.rel))
         self.angle += self.rel * s.MOUSE_SENSITIVITY * self.game.delta_time
 
@@ -0,0 +1,157 @@
+import pygame as pg
+import numpy as np
+import json
+import os
+import gc
+from time import perf_counter
+from datetime import datetime
+from loguru import logger
+
+from PyQt_DOOM.app_paths import app_dir
+
+
+# gc is the time of garbage collections, it is also part of the stage the collection interrupted
+# render_wait is the time the pipelined loop waits for the render thread, which times objects_to_render and draw of the
+# previous frame in parallel to the simulation
+STAGES = ('events', 'player', 'ray_cast', 'objects_to_render', 'sprites', 'npc_ai', 'pathfinding', 'weapon', 'draw',
+          'flip', 'wait', 'render_wait', 'level_load', 'gc', 'frame')
+(EVENTS, PLAYER, RAY_CAST, OBJECTS_TO_RENDER, SPRITES, NPC_AI, PATHFINDING, WEAPON, DRAW,
+ FLIP, WAIT, RENDER_WAIT, LEVEL_LOAD, GC, FRAME) = range(len(STAGES))
+
+
+class FrameProfiler:
+    """
+    Time of every stage of the last frames in a ring buffer.
+
+    Stages add their time to the row of the current frame, the row is copied into the buffer when the frame ends. A
+    stage can be timed several times per frame (one pathfinding call per NPC), the times are summed.
+    """
+    def __init__(self, capacity=1200, overlay_frames=120, overlay_interval=250):
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, len(STAGES)))
+        self.frame = [0.0] * len(STAGES)
+        self.count = 0
+        self.frame_start = perf_counter()
+        self.overlay = False
+        self.overlay_frames = overlay_frames
+        self.overlay_interval = overlay_interval
+        self._overlay_image = None
+        self._overlay_time = 0
+        self._font = None
+        self._gc_start = 0.0
+        gc.callbacks.append(self._gc_callback)
+
+    def _gc_callback(self, phase, info):
+        if phase == 'start':
+            self._gc_start = perf_counter()
+        else:
+            self.frame[GC] += perf_counter() - self._gc_start
+
+    def close(self):
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+
+    def begin_frame(self):
+        self.frame = [0.0] * len(STAGES)
+        self.frame_start = perf_counter()
+        return self.frame_start
+
+    def lap(self, stage, time_start):
+        """
+        Add the time since time_start to the stage.
+
+        :return:    current time, the start of the next stage
+        """
+        time_now = perf_counter()
+        self.frame[stage] += time_now - time_start
+        return time_now
+
+    def end_frame(self):
+        self.frame[FRAME] = perf_counter() - self.frame_start
+        self.buffer[self.count % self.capacity] = self.frame
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+        self._overlay_image = None
+
+    def frames(self, last=None) -> np.ndarray:
+        """
+        :return:    stage times in seconds of the buffered frames, oldest first, one row per frame
+        """
+        stored = min(self.count, self.capacity)
+        if last is not None:
+            stored = min(stored, last)
+        rows = np.arange(self.count - stored, self.count) % self.capacity
+        return self.buffer[rows]
+
+    def summary(self, last=None) -> dict:
+        """
+        :return:    mean and max time in milliseconds of every stage
+        """
+        frames = self.frames(last) * 1000
+        if not len(frames):
+            return {}
+        return {stage: {'mean': float(frames[:, i].mean()), 'max': float(frames[:, i].max())}
+                for i, stage in enumerate(STAGES)}
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self._overlay_image = None
+
+    def draw_overlay(self, screen):
+        """
+        Draw the per-stage means and maxima of the last overlay_frames frames, the text is rendered again every
+        overlay_interval ms only.
+        """
+        if not self.overlay:
+            return
+        time_now = pg.time.get_ticks()
+        if self._overlay_image is None or time_now - self._overlay_time > self.overlay_interval:
+            self._overlay_image = self._render_overlay()
+            self._overlay_time = time_now
+        screen.blit(self._overlay_image, (0, screen.get_height() - self._overlay_image.get_height()))
+
+    def _render_overlay(self):
+        if self._font is None:
+            self._font = pg.font.Font(None, 22)
+        summary = self.summary(self.overlay_frames)
+        rows = [('stage ms', 'mean', 'max')]
+        rows += [(stage, f"{times['mean']:.2f}", f"{times['max']:.2f}") for stage, times in summary.items()]
+        line_height = self._font.get_linesize()
+        image = pg.Surface((260, line_height * len(rows) + 8), pg.SRCALPHA)
+        image.fill((0, 0, 0, 160))
+        for i, row in enumerate(rows):
+            for x, text in zip((4, 154, 214), row):
+                image.blit(self._font.render(text, True, (230, 230, 230)), (x, 4 + i * line_height))
+        return image
+
+    def export_csv(self, path):
+        frames = self.frames() * 1000
+        first = self.count - len(frames)
+        with open(path, 'w') as f:
+            f.write(','.join(('frame',) + tuple(f"{stage}_ms" for stage in STAGES)) + '\n')
+            for i, row in enumerate(frames):
+                f.write(f"{first + i}," + ','.join(f"{value:.4f}" for value in row) + '\n')
+
+    def export_json(self, path):
+        frames = self.frames() * 1000
+        with open(path, 'w') as f:
+            json.dump({'stages': STAGES, 'unit': 'ms', 'first_frame': self.count - len(frames),
+                       'summary': self.summary(), 'frames': np.round(frames, 4).tolist()}, f)
+
+    def export(self, folder=None):
+        """
+        Write the buffered frames as csv and json files named by the current time.
+
+        :return:    path of the csv file
+        """
+        if folder is None:
+            folder = app_dir() / 'profiles'
+        if not folder.is_dir():
+            os.makedirs(folder)
+        name = datetime.now().strftime('frames_%Y%m%d_%H%M%S')
+        self.export_csv(folder / f"{name}.csv")
+        self.export_json(folder / f"{name}.json")
+        logger.info(f"FrameProfiler: {min(self.count, self.capacity)} frames exported to {folder / name}.csv/.json")
+        return folder / f"{name}.csv"
@@ -1,5 +1,9 @@
 import pygame as pg
+import numpy as np
 import math
+from time import perf_counter
+
+from PyQt_DOOM.profiler import RAY_CAST, OBJECTS_TO_RENDER
 
 
 class RayCasting:
@@ -7,18 +11,50 @@ class RayCasting:
         self.game = game
         self.ray_casting_result = []
         self.objects_to_render = []
+        self.npcs_on_screen = []
+        # pipelined render: sprites are only projected and the render thread scales walls and sprites
+        self.deferred = game.settings.pipelined_render
+        self.sprite_projections = []
         self.textures = self.game.object_renderer.wall_textures
+        self.mips = self.game.object_renderer.wall_mips
+        self.wall_columns = self.get_wall_columns()
+        self.kernel_result = np.zeros((self.game.settings.NUM_RAYS, 4))
+
+    def get_wall_columns(self):
+        """
+        Cut every mip level of the wall textures into columns once.
+
+        :return:    for every texture a table indexed by the projected wall height up to TEXTURE_SIZE, holding the
+                    columns of the smallest level still as tall as the wall
+        """
+        s = self.game.settings
+        wall_columns = {}
+        for texture, mips in self.mips.items():
+            level_columns = []
+            for level in mips.levels:
+                level_size = level.get_height()
+                column_width = max(1, s.SCALE * level_size // s.TEXTURE_SIZE)
+                level_columns.append([level.subsurface(x, 0, column_width, level_size)
+                                      for x in range(level_size - column_width + 1)])
+            wall_columns[texture] = [level_columns[mips.level_index(1, height)] for height in range(s.TEXTURE_SIZE + 1)]
+        return wall_columns
 
     def get_objects_to_render(self):
+        self.objects_to_render = self.wall_objects(self.ray_casting_result)
+        self.npcs_on_screen = []
+
+    def wall_objects(self, ray_casting_result) -> list:
+        """
+        :return:    depth, scaled wall column and screen position of every ray
+        """
         s = self.game.settings
-        self.objects_to_render = []
-        for ray, values in enumerate(self.ray_casting_result):
+        objects = []
+        for ray, values in enumerate(ray_casting_result):
             depth, proj_height, texture, offset = values
 
             if proj_height < s.resolution[1]:
-                wall_column = self.textures[texture].subsurface(
-                    offset * (s.TEXTURE_SIZE - s.SCALE), 0, s.SCALE, s.TEXTURE_SIZE
-                )
+                columns = self.wall_columns[texture][min(int(proj_height), s.TEXTURE_SIZE)]
+                wall_column = columns[int(offset * (len(columns) - 1))]
                 wall_column = pg.transform.scale(wall_column, (s.SCALE, proj_height))
                 wall_pos = (ray * s.SCALE, s.HALF_HEIGHT - proj_height // 2)
             else:
@@ -30,9 +66,21 @@ class RayCasting:
                 wall_column = pg.transform.scale(wall_column, (s.SCALE, s.resolution[1]))
                 wall_pos = (ray * s.SCALE, 0)
 
-            self.objects_to_render.append((depth, wall_column, wall_pos))
+            objects.append((depth, wall_column, wall_pos))
+        return objects
+
+    def ray_cast_kernel(self):
+        s = self.game.settings
+        player = self.game.player
+        self.game.kernels.cast_rays(self.game.map.grid, player.x, player.y, player.angle, s.HALF_FOV, s.DELTA_ANGLE,
+                                    s.NUM_RAYS, s.MAX_DEPTH, s.SCREEN_DIST, self.kernel_result)
+        self.ray_casting_result = [(depth, proj_height, int(texture), offset)
+                                   for depth, proj_height, texture, offset in self.kernel_result.tolist()]
 
     def ray_cast(self):
+        if self.game.kernels is not None:
+            self.ray_cast_kernel()
+            return
         s = self.game.settings
         self.ray_casting_result = []
         texture_vert, texture_hor = 1, 1
@@ -101,6 +149,21 @@ class RayCasting:
 
             ray_angle += s.DELTA_ANGLE
 
+    def reset(self):
+        self.ray_casting_result = []
+        self.objects_to_render = []
+        self.npcs_on_screen = []
+        self.sprite_projections = []
+
     def update(self):
+        profiler = self.game.profiler
+        time_start = perf_counter()
         self.ray_cast()
-        self.get_objects_to_render()
\ No newline at end of file
+        time_start = profiler.lap(RAY_CAST, time_start)
+        if self.deferred:
+            # new lists every frame, the previous ones belong to the snapshot being rendered
+            self.sprite_projections = []
+            self.npcs_on_screen = []
+            return
+        self.get_objects_to_render()
+        profiler.lap(OBJECTS_TO_RENDER, time_start)
\ No newline at end of file
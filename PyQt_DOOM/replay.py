@@ -0,0 +1,161 @@
+import pygame as pg
+import pathlib as pl
+import random
+import json
+import os
+from datetime import datetime
+from loguru import logger
+
+from PyQt_DOOM.app_paths import app_dir
+
+
+movement_keys = {'w': pg.K_w, 'a': pg.K_a, 's': pg.K_s, 'd': pg.K_d}
+
+
+class KeyState:
+    """
+    Pressed state of the movement keys, indexed by key code like the sequence returned by pygame.key.get_pressed.
+    """
+    def __init__(self, pressed=''):
+        self.codes = {movement_keys[key] for key in pressed}
+
+    def __getitem__(self, code):
+        return code in self.codes
+
+
+class Replay:
+    """
+    Recorded session played back with a simulated clock.
+
+    A session is a seed and a list of segments, each holding the movement keys, the mouse movement and the fire button
+    for a number of frames. Every frame advances the clock by frame_ms, so the game sees the same time, input and
+    random numbers on every run and on every machine. The game takes the clock, the input and the timer events from the
+    replay instead of pygame, a quit event is sent after the last segment. The frames are drawn to the pygame display.
+    """
+    def __init__(self, segments, seed=0, frame_ms=16, name='replay', resolution=None):
+        """
+        :param segments:    dicts with 'frames' and optional 'keys' (string of wasd), 'turn' (mouse x movement per
+                            frame) and 'fire' (click on every frame of the segment)
+        :param resolution:  resolution the session is played at, the settings are used when not given
+        """
+        self.name = name
+        self.seed = seed
+        self.frame_ms = frame_ms
+        self.resolution = resolution
+        self.segments = segments
+        self.frame_count = sum(segment['frames'] for segment in segments)
+        self.frame = 0
+        self.time = 0
+        self._timers = {}
+        self._frames = self._expand()
+        self._keys = KeyState()
+        self._rel = 0
+        self._fire = False
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        resolution = tuple(data['resolution']) if 'resolution' in data else None
+        return cls(data['segments'], data.get('seed', 0), data.get('frame_ms', 16), data.get('name', pl.Path(path).stem),
+                   resolution)
+
+    def _expand(self):
+        for segment in self.segments:
+            keys = KeyState(segment.get('keys', ''))
+            for i in range(segment['frames']):
+                yield keys, segment.get('turn', 0), segment.get('fire', False)
+
+    @property
+    def finished(self) -> bool:
+        return self.frame >= self.frame_count
+
+    # display
+
+    def set_mode(self, size, flags=0):
+        return pg.display.set_mode(size, flags)
+
+    def flip(self):
+        pg.display.flip()
+
+    # clock
+
+    def tick(self, fps_limit=0) -> int:
+        self.time += self.frame_ms
+        return self.frame_ms
+
+    def get_fps(self) -> float:
+        return 1000 / self.frame_ms
+
+    def get_ticks(self) -> int:
+        return self.time
+
+    def set_timer(self, event, millis):
+        self._timers[event] = [millis, self.time + millis]
+
+    # input
+
+    def get_events(self) -> list:
+        # events of the real display are dropped, the dummy driver still queues them
+        pg.event.get()
+        if self.finished:
+            return [pg.event.Event(pg.QUIT)]
+        self._keys, self._rel, self._fire = next(self._frames)
+        self.frame += 1
+        events = []
+        for event, timer in self._timers.items():
+            if self.time >= timer[1]:
+                timer[1] += timer[0]
+                events.append(pg.event.Event(event))
+        if self._fire:
+            events.append(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(0, 0)))
+        return events
+
+    def get_pressed(self):
+        return self._keys
+
+    def get_rel(self) -> tuple:
+        return self._rel, 0
+
+
+class Recorder:
+    """
+    Records the input of a played session into the segments of a Replay. The seed is drawn when the recording starts
+    and seeds the game, equal consecutive frames are merged into one segment.
+    """
+    def __init__(self, frame_ms=16):
+        self.seed = random.randrange(2 ** 32)
+        self.frame_ms = frame_ms
+        self.segments = []
+        self._fire = False
+        random.seed(self.seed)
+
+    def event(self, event):
+        if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+            self._fire = True
+
+    def end_frame(self, rel):
+        keys = pg.key.get_pressed()
+        frame = {'keys': ''.join(key for key, code in movement_keys.items() if keys[code]), 'turn': rel,
+                 'fire': self._fire}
+        self._fire = False
+        last = self.segments[-1] if self.segments else None
+        if last is not None and all(last[key] == value for key, value in frame.items()):
+            last['frames'] += 1
+        else:
+            self.segments.append({'frames': 1, **frame})
+
+    def write(self, settings, folder=None):
+        if folder is None:
+            folder = app_dir() / 'replays'
+        if not self.segments:
+            return None
+        if not folder.is_dir():
+            os.makedirs(folder)
+        path = folder / datetime.now().strftime('replay_%Y%m%d_%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump({'name': path.stem, 'seed': self.seed, 'frame_ms': self.frame_ms,
+                       'resolution': list(settings.resolution), 'segments': self.segments}, f, indent=1)
+        logger.info(f"Recorder: {sum(s['frames'] for s in self.segments)} frames in {len(self.segments)} segments "
+                    f"written to {path}")
+        return path
@@ -0,0 +1,62 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class ScoreTableModel(QAbstractTableModel):
+    """
+    Scoreboard ranking read from the score store in batches, the view fetches the next batch when it scrolls to the
+    end of the loaded rows. A new score is inserted at its rank without reloading the rest.
+    """
+    headers = ['Score', 'Level', 'Game date']
+
+    def __init__(self, store, batch=100, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.batch = batch
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        score = self._rows[index.row()]
+        match index.column():
+            case 0:
+                return str(score.score)
+            case 1:
+                return str(score.level)
+            case 2:
+                return score.time_text()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self._rows) < len(self.store)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        rows = self.store.ranking(len(self._rows), self.batch)
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def add_score(self, score):
+        """
+        Insert a score just added to the store. Scores ranked below the loaded rows arrive with a later fetch.
+        """
+        position = self.store.rank(score)
+        if position > len(self._rows):
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, score)
+        self.endInsertRows()
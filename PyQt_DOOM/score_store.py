@@ -0,0 +1,175 @@
+import sqlite3
+import json
+import os
+from loguru import logger
+from datetime import datetime
+
+from PyQt_DOOM.app_paths import app_dir
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    kill_list TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_ranking ON scores (score DESC, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _level(kill_list) -> int:
+    return 1 + sum(1 for a in kill_list if a == 'Level Finished')
+
+
+def kill_score(enemy_type) -> int:
+    """
+    :return:    points for a killed enemy type or a finished level
+    """
+    match enemy_type:
+        case 'Soldier':
+            return 2
+        case 'Cyber Demon':
+            return 7
+        case 'Caco Demon':
+            return 3
+        case 'Level Finished':
+            return 10
+        case _:
+            logger.error("You have killed some rare, unknown enemy, congrats :)")
+            raise RuntimeError
+
+
+def _time_now() -> str:
+    return str(datetime.now()).replace('-', '').replace(' ', '').replace('.', '').replace(':', '')
+
+
+class StoredScore:
+    def __init__(self, id, name, score, level, time):
+        """
+        :param id:      database row id, ties in the ranking are ordered by it
+        :param name:    unique score name
+        :param score:   score (int)
+        :param level:   level reached
+        :param time:    game time formatted as YYYYMMDDhhmmss followed by microseconds
+        """
+        self.id = id
+        self.name = name
+        self.score = score
+        self.level = level
+        self.time = time
+
+    def time_text(self) -> str:
+        gt = self.time
+        return f"{gt[:4]} {gt[4:6]} {gt[6:8]} - {gt[8:10]}:{gt[10:12]}"
+
+
+class ScoreStore:
+    """
+    All recorded games in one SQLite database.
+
+    The ranking is an index on the score column, so the best score and any page of the ranking are read without
+    touching the other rows. Score files of the old one-json-file-per-game format found in the scores folder are
+    imported once.
+    """
+    def __init__(self, path=None, json_folder=None):
+        if path is None:
+            path = app_dir() / 'scores.sqlite3'
+        if json_folder is None:
+            json_folder = app_dir() / 'scores'
+        if not path.parent.is_dir():
+            os.makedirs(path.parent)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_schema)
+        self._migrate_json(json_folder)
+        self._count, self._best = self.connection.execute("SELECT COUNT(*), COALESCE(MAX(score), 0) FROM scores").fetchone()
+        logger.debug(f"ScoreStore {path}: {self._count} scores")
+
+    def _migrate_json(self, folder):
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        rows = []
+        if folder.is_dir():
+            for fpath in sorted(folder.glob('*.json')):
+                try:
+                    with open(fpath) as f:
+                        the_dict = json.load(f)
+                    rows.append((the_dict['name'], the_dict['score'], _level(the_dict['kill_list']), fpath.stem,
+                                 json.dumps(the_dict['kill_list'])))
+                except Exception as e:
+                    logger.debug(f"{fpath}: {e}")
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO scores (name, score, level, time, kill_list) "
+                                        "VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (_time_now(),))
+        logger.info(f"ScoreStore: {len(rows)} json score files imported from {folder}")
+
+    def __len__(self):
+        return self._count
+
+    def best_score(self) -> int:
+        return self._best
+
+    def exists(self, name: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM scores WHERE name = ?", (name,)).fetchone() is not None
+
+    def get(self, name: str) -> StoredScore:
+        row = self.connection.execute("SELECT id, name, score, level, time FROM scores WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            logger.error(f"Score {name} does not exist!")
+            raise FileNotFoundError
+        return StoredScore(*row)
+
+    def kill_list(self, name: str) -> list[str]:
+        row = self.connection.execute("SELECT kill_list FROM scores WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            logger.error(f"Score {name} does not exist!")
+            raise FileNotFoundError
+        return json.loads(row[0])
+
+    def next_game_name(self) -> str:
+        i = self._count + 1
+        while self.exists(f"Game {i}"):
+            i += 1
+        return f"Game {i}"
+
+    def add(self, score: int, kill_list: list[str], name: str = None) -> StoredScore:
+        time = _time_now()
+        if name in [None, '']:
+            name = time
+        level = _level(kill_list)
+        try:
+            with self.connection:
+                cursor = self.connection.execute("INSERT INTO scores (name, score, level, time, kill_list) VALUES (?, ?, ?, ?, ?)",
+                                                 (name, score, level, time, json.dumps(kill_list)))
+        except sqlite3.IntegrityError:
+            logger.error(f"Score {name} already exists!")
+            raise RuntimeError
+        self._count += 1
+        self._best = max(self._best, score)
+        return StoredScore(cursor.lastrowid, name, score, level, time)
+
+    def rank(self, record: StoredScore) -> int:
+        """
+        :return:    zero based position of the score in the ranking
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM scores WHERE score > ? OR (score = ? AND id < ?)",
+                                       (record.score, record.score, record.id)).fetchone()[0]
+
+    def ranking(self, offset: int = 0, limit: int = -1) -> list[StoredScore]:
+        """
+        :return:    scores from the best one, sliced by offset and limit
+        """
+        rows = self.connection.execute("SELECT id, name, score, level, time FROM scores ORDER BY score DESC, id "
+                                       "LIMIT ? OFFSET ?", (limit, offset))
+        return [StoredScore(*row) for row in rows]
+
+    def close(self):
+        self.connection.close()
@@ -1,39 +1,146 @@
 import pygame as pg
 import pathlib as pl
 
+from PyQt_DOOM.assets import AssetManager
+
+
+class Voice:
+    """
+    One game sound: a shared buffer with its volume, the number of copies allowed to play at once and a priority used
+    when channels run out.
+    """
+    def __init__(self, manager, sound, volume, max_voices=2, priority=1):
+        self.manager = manager
+        self.sound = sound
+        self.volume = volume
+        self.max_voices = max_voices
+        self.priority = priority
+        self.channels = []
+
+    def play(self, distance=0.0):
+        return self.manager.play(self, distance)
+
+
+class SoundManager:
+    """
+    Process-wide mixer state.
+
+    The mixer is initialized once, decoded buffers are kept for the whole process and sounds play on a fixed pool of
+    channels. A voice over its limit restarts its oldest copy that is not closer than the new one, so a retriggered
+    player sound is heard again, and is dropped when all its copies are closer. When all channels are busy the playing
+    sound with the lowest priority and the largest distance is stopped if the new one outranks it.
+    """
+    def __init__(self, channels=16):
+        self.num_channels = channels
+        self.channels = []
+        self.channel_rank = []
+        self._buffers = {}
+        self._music_path = None
+        self.culled = 0
+
+    def init(self):
+        if not pg.mixer.get_init():
+            pg.mixer.init()
+            self._buffers.clear()
+            self._music_path = None
+        if len(self.channels) != self.num_channels:
+            pg.mixer.set_num_channels(self.num_channels)
+            self.channels = [pg.mixer.Channel(i) for i in range(self.num_channels)]
+            self.channel_rank = [(0, 0.0)] * self.num_channels
+
+    def quit(self):
+        pg.mixer.quit()
+        self._buffers.clear()
+        self._music_path = None
+        self.channels = []
+        self.channel_rank = []
+
+    def buffer(self, path) -> pg.mixer.Sound:
+        path = str(path)
+        sound = self._buffers.get(path)
+        if sound is None:
+            sound = pg.mixer.Sound(path)
+            self._buffers[path] = sound
+        return sound
+
+    def load_music(self, path):
+        path = str(path)
+        if self._music_path != path:
+            pg.mixer.music.load(path)
+            self._music_path = path
+
+    def voice(self, path, volume, max_voices=2, priority=1) -> Voice:
+        return Voice(self, self.buffer(path), volume, max_voices, priority)
+
+    def _free_channel(self, rank):
+        victim = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+            if victim is None or self._outranks(self.channel_rank[victim], self.channel_rank[i]):
+                victim = i
+        if victim is not None and self._outranks(rank, self.channel_rank[victim]):
+            return victim
+        return None
+
+    @staticmethod
+    def _outranks(rank, other) -> bool:
+        priority, distance = rank
+        other_priority, other_distance = other
+        return priority > other_priority or (priority == other_priority and distance < other_distance)
+
+    def play(self, voice, distance=0.0):
+        """
+        :return:    the channel the voice plays on or None when it was culled
+        """
+        rank = voice.priority, distance
+        voice.channels = [i for i in voice.channels if self.channels[i].get_busy() and self.channels[i].get_sound() == voice.sound]
+        if len(voice.channels) >= voice.max_voices:
+            # voice.channels is in play order, the oldest copy not closer than the new one is restarted
+            index = next((i for i in voice.channels if self.channel_rank[i][1] >= distance), None)
+            if index is None:
+                self.culled += 1
+                return None
+            voice.channels.remove(index)
+            self.channels[index].stop()
+        else:
+            index = self._free_channel(rank)
+            if index is None:
+                self.culled += 1
+                return None
+        channel = self.channels[index]
+        channel.play(voice.sound)
+        channel.set_volume(voice.volume)
+        self.channel_rank[index] = rank
+        voice.channels.append(index)
+        return channel
+
+
+sound_manager = SoundManager()
+
 
 class Sound:
     def __init__(self, game, settings):
         self.game = game
-        pg.mixer.init()
+        sound_manager.init()
+        voice = sound_manager.voice
 
-        if settings.original_pack:
-            self.path = str(pl.Path(__file__).parent / 'resources' / 'sound')
-        else:
-            self.path = str(pl.Path(__file__).parent / 'resources_alt' / 'sound')
+        self.path = str(AssetManager.pack_dir(settings.original_pack) / 'sound')
 
-        self.shotgun = pg.mixer.Sound(str(pl.Path(self.path) / 'shotgun.wav'))
-        self.shotgun.set_volume(settings.volume_weapon * settings.volume_master)
+        self.shotgun = voice(pl.Path(self.path) / 'shotgun.wav', settings.volume_weapon * settings.volume_master, 1, 3)
 
-        self.npc_pain = pg.mixer.Sound(str(pl.Path(self.path) / 'npc_pain.wav'))  # soldier / greta
-        self.npc_pain.set_volume(settings.volume_enemies * settings.volume_master)
-        self.npc_pain2 = pg.mixer.Sound(str(pl.Path(self.path) / 'npc_pain2.wav'))  # monsters
-        self.npc_pain2.set_volume(settings.volume_enemies * settings.volume_master)
+        self.npc_pain = voice(pl.Path(self.path) / 'npc_pain.wav', settings.volume_enemies * settings.volume_master, 2, 2)  # soldier / greta
+        self.npc_pain2 = voice(pl.Path(self.path) / 'npc_pain2.wav', settings.volume_enemies * settings.volume_master, 2, 2)  # monsters
 
-        self.npc_death = pg.mixer.Sound(str(pl.Path(self.path) / 'npc_death.wav'))
-        self.npc_death.set_volume(settings.volume_enemies * settings.volume_master)
+        self.npc_death = voice(pl.Path(self.path) / 'npc_death.wav', settings.volume_enemies * settings.volume_master, 3, 2)
 
-        self.npc_shot = pg.mixer.Sound(str(pl.Path(self.path) / 'npc_attack.wav'))
-        self.npc_shot.set_volume(0.2 * settings.volume_enemies * settings.volume_master)
+        self.npc_shot = voice(pl.Path(self.path) / 'npc_attack.wav', 0.2 * settings.volume_enemies * settings.volume_master, 3, 1)
 
-        self.player_pain = pg.mixer.Sound(str(pl.Path(self.path) / 'player_pain.wav'))
-        self.player_pain.set_volume(settings.volume_player * settings.volume_master)
+        self.player_pain = voice(pl.Path(self.path) / 'player_pain.wav', settings.volume_player * settings.volume_master, 1, 3)
 
-        self.victory = pg.mixer.Sound(str(pl.Path(self.path) / 'victory.wav'))
-        self.victory.set_volume(settings.volume_master)
+        self.victory = voice(pl.Path(self.path) / 'victory.wav', settings.volume_master, 1, 4)
 
-        self.lose = pg.mixer.Sound(str(pl.Path(self.path) / 'lose.wav'))
-        self.lose.set_volume(settings.volume_master)
+        self.lose = voice(pl.Path(self.path) / 'lose.wav', settings.volume_master, 1, 4)
 
-        self.theme = pg.mixer.music.load(str(pl.Path(self.path) / 'theme.mp3'))
+        self.theme = sound_manager.load_music(pl.Path(self.path) / 'theme.mp3')
         pg.mixer.music.set_volume(0.3 * settings.volume_music * settings.volume_master)
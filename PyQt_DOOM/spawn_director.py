@@ -0,0 +1,125 @@
+import pygame as pg
+import math
+from random import choices, randrange
+
+from PyQt_DOOM.event_log import event_log, EventType, DEBUG
+
+
+NO_FREE_TILE_EVENT = EventType('spawn', DEBUG, "SpawnDirector: no free tile left, {} NPCs not spawned")
+
+
+class FreeTileIndex:
+    """
+    Tiles available for spawning, sampled uniformly without replacement in O(1).
+    """
+    def __init__(self, tiles=()):
+        self.tiles = list(tiles)
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def add(self, tile):
+        self.tiles.append(tile)
+
+    def pop_random(self):
+        i = randrange(len(self.tiles))
+        self.tiles[i], self.tiles[-1] = self.tiles[-1], self.tiles[i]
+        return self.tiles.pop()
+
+
+class SpawnDirector:
+    """
+    Spawns the NPCs of a level in waves.
+
+    Free tiles are indexed once per level and grouped into square regions of REGION_SIZE tiles. A region accepts at
+    most REGION_CAP NPCs, sampling picks a region weighted by its remaining free tiles and then a tile inside it, so
+    the cost of one spawn depends on the number of regions only, never on how solid the map is.
+    """
+    REGION_SIZE = 8
+    REGION_CAP = 4
+
+    def __init__(self, handler, wave_size=5, wave_interval=5000, min_player_dist=4, regions=None):
+        self.handler = handler
+        self.game = handler.game
+        self.wave_size = wave_size
+        self.wave_interval = wave_interval
+        self.min_player_dist = min_player_dist
+        self.regions = {}
+        self.region_counts = {}
+        self.pending = 0
+        self.time_prev = 0
+        self.reset(regions)
+
+    @classmethod
+    def get_regions(cls, level_map, restricted_area) -> dict:
+        """
+        :return:    free tiles of the map outside the restricted area, indexed by region
+        """
+        regions = {}
+        for y in range(level_map.rows):
+            for x in range(level_map.cols):
+                if (x, y) not in level_map.world_map and (x, y) not in restricted_area:
+                    regions.setdefault(cls.region(x, y), FreeTileIndex()).add((x, y))
+        return regions
+
+    def reset(self, regions=None):
+        """
+        :param regions:     free tiles prepared by get_regions, indexed from the game map when not given
+        """
+        if regions is None:
+            regions = self.get_regions(self.game.map, self.handler.restricted_area)
+        self.regions = regions
+        self.region_counts = dict.fromkeys(self.regions, 0)
+        self.pending = self.handler.enemies
+        self.spawn_wave()
+
+    @classmethod
+    def region(cls, x, y):
+        return x // cls.REGION_SIZE, y // cls.REGION_SIZE
+
+    @property
+    def finished(self):
+        return not self.pending
+
+    def open_regions(self):
+        return [r for r, tiles in self.regions.items() if len(tiles) and self.region_counts[r] < self.REGION_CAP]
+
+    def sample_tile(self):
+        """
+        :return:    free tile away from the player or None when every region is full or exhausted
+        """
+        rejected = []
+        tile = None
+        while tile is None:
+            regions = self.open_regions()
+            if not regions:
+                break
+            region = choices(regions, [len(self.regions[r]) for r in regions])[0]
+            candidate = self.regions[region].pop_random()
+            px, py = self.game.player.pos
+            if math.hypot(candidate[0] + 0.5 - px, candidate[1] + 0.5 - py) < self.min_player_dist:
+                rejected.append((region, candidate))
+            else:
+                tile = candidate
+                self.region_counts[region] += 1
+        for region, candidate in rejected:
+            self.regions[region].add(candidate)
+        return tile
+
+    def spawn_wave(self):
+        self.time_prev = self.game.get_ticks()
+        for i in range(min(self.wave_size, self.pending)):
+            tile = self.sample_tile()
+            if tile is None:
+                if not self.open_regions():
+                    event_log.log(NO_FREE_TILE_EVENT, self.pending)
+                    self.pending = 0
+                return
+            x, y = tile
+            npc = choices(self.handler.npc_types, self.handler.weights)[0]
+            self.handler.add_npc(self.handler.get_npc(npc, pos=(x + 0.5, y + 0.5)))
+            self.pending -= 1
+
+    def update(self):
+        if self.pending and self.game.get_ticks() - self.time_prev > self.wave_interval:
+            self.spawn_wave()
@@ -1,20 +1,22 @@
 import pygame as pg
 import pathlib as pl
-import os
 import math
-from collections import deque
+
+from PyQt_DOOM.assets import assets
+from PyQt_DOOM.frame_store import frame_store
 
 
 class SpriteObject:
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'static_sprites' / 'candlebra.png'),
-                 pos=(10.5, 3.5), scale=0.7, shift=0.27):
-        if not game.settings.original_pack and path == str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'static_sprites' / 'candlebra.png'):
-            path = str(pl.Path(__file__).parent / 'resources_alt' / 'sprites' / 'static_sprites' / 'candlebra.png')
+    def __init__(self, game, path=None, pos=(10.5, 3.5), scale=0.7, shift=0.27):
+        if path is None:
+            path = assets.path('sprites', 'static_sprites', 'candlebra.png')
 
         self.game = game
         self.player = game.player
         self.x, self.y = pos
-        self.image = pg.image.load(path).convert_alpha()
+        self.image = assets.image(path)
+        self.base_image = self.image
+        assets.mipmap(self.image)
         self.IMAGE_WIDTH = self.image.get_width()
         self.IMAGE_HALF_WIDTH = self.image.get_width() // 2
         self.IMAGE_RATIO = self.IMAGE_WIDTH / self.image.get_height()
@@ -28,13 +30,18 @@ class SpriteObject:
         proj = s.SCREEN_DIST / self.norm_dist * self.SPRITE_SCALE
         proj_width, proj_height = proj * self.IMAGE_RATIO, proj
 
-        image = pg.transform.scale(self.image, (proj_width, proj_height))
+        image = assets.mipmap(self.image).select(proj_width, proj_height)
 
         self.sprite_half_width = proj_width // 2
         height_shift = proj_height * self.SPRITE_HEIGHT_SHIFT
         pos = self.screen_x - self.sprite_half_width, s.HALF_HEIGHT - proj_height // 2 + height_shift
 
-        self.game.raycasting.objects_to_render.append((self.norm_dist, image, pos))
+        raycasting = self.game.raycasting
+        if raycasting.deferred:
+            raycasting.sprite_projections.append((self.norm_dist, image, (proj_width, proj_height), pos))
+        else:
+            image = pg.transform.scale(image, (proj_width, proj_height))
+            raycasting.objects_to_render.append((self.norm_dist, image, pos))
 
     def get_sprite(self):
         s = self.game.settings
@@ -55,22 +62,36 @@ class SpriteObject:
         if -self.IMAGE_HALF_WIDTH < self.screen_x < (s.resolution[0] + self.IMAGE_HALF_WIDTH) and self.norm_dist > 0.5:
             self.get_sprite_projection()
 
+    def reset(self, pos=None):
+        if pos is not None:
+            self.x, self.y = pos
+        self.player = self.game.player
+        self.image = self.base_image
+        self.dx, self.dy, self.theta, self.screen_x, self.dist, self.norm_dist = 0, 0, 0, 0, 1, 1
+        self.sprite_half_width = 0
+
     def update(self):
         self.get_sprite()
 
 
 class AnimatedSprite(SpriteObject):
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'animated_sprites' / 'green_light' / '0.png'),
-                 pos=(11.5, 3.5), scale=0.8, shift=0.16, animation_time=120, enemy_type=''):
-        if not game.settings.original_pack and path == str(pl.Path(__file__).parent / 'resources' / 'sprites' / 'animated_sprites' / 'green_light' / '0.png'):
-            path = str(pl.Path(__file__).parent / 'resources_alt' / 'sprites' / 'animated_sprites' / 'green_light' / '0.png')
+    def __init__(self, game, path=None, pos=(11.5, 3.5), scale=0.8, shift=0.16, animation_time=120, enemy_type=''):
+        if path is None:
+            path = assets.path('sprites', 'animated_sprites', 'green_light', '0.png')
 
         super().__init__(game, path, pos, scale, shift)
         self.enemy_type = enemy_type
         self.animation_time = animation_time
         self.path = str(pl.Path(path).parent)
         self.images = self.get_images(self.path)
-        self.animation_time_prev = pg.time.get_ticks()
+        self.frame_index = 0
+        self.animation_time_prev = self.game.get_ticks()
+        self.animation_trigger = False
+
+    def reset(self, pos=None):
+        super().reset(pos)
+        self.frame_index = 0
+        self.animation_time_prev = self.game.get_ticks()
         self.animation_trigger = False
 
     def update(self):
@@ -80,20 +101,16 @@ class AnimatedSprite(SpriteObject):
 
     def animate(self, images):
         if self.animation_trigger:
-            images.rotate(-1)
-            self.image = images[0]
+            self.frame_index = (self.frame_index + 1) % len(images)
+            self.image = images[self.frame_index]
 
     def check_animation_time(self):
         self.animation_trigger = False
-        time_now = pg.time.get_ticks()
+        time_now = self.game.get_ticks()
         if time_now - self.animation_time_prev > self.animation_time:
             self.animation_time_prev = time_now
             self.animation_trigger = True
 
-    def get_images(self, path):
-        images = deque()
-        for file_name in os.listdir(path):
-            if os.path.isfile(os.path.join(path, file_name)):
-                img = pg.image.load(path + '/' + file_name).convert_alpha()
-                images.append(img)
-        return images
+    @staticmethod
+    def get_images(path):
+        return frame_store.get(path)
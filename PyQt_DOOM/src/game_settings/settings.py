@@ -1,20 +1,18 @@
 from time import sleep
 import pathlib as pl
-import pygame as pg
 import random
 import json
 import math
 import os
 
-from PyQt5 import uic
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QDialog
 
-from PyQt_DOOM.sound import Sound
+from PyQt_DOOM.ui_loader import load_ui
+from PyQt_DOOM.app_paths import app_dir
 
 
 _help_path = pl.Path(__file__).parent / 'settings.ui'
-_help_dialog = uic.loadUiType(_help_path)[0]
 
 
 _resolution_720 = 1280, 720
@@ -38,6 +36,7 @@ _fps_limits = {
 
 
 def save_json(data: dict, path: str | pl.Path) -> None:
+    os.makedirs(pl.Path(path).parent, exist_ok=True)
     with open(path, 'w') as outfile:
         json.dump(data, outfile, indent=4)
 
@@ -49,7 +48,9 @@ def load_json(path: str | pl.Path) -> dict:
 
 
 class GameSettings:
-    def __init__(self, fpath: pl.Path = pl.Path(os.getenv('LOCALAPPDATA')) / 'PyQt_DOOM' / 'settings.json'):
+    def __init__(self, fpath: pl.Path = None):
+        if fpath is None:
+            fpath = app_dir() / 'settings.json'
         # unmodifiable
         self.PLAYER_POS = 1.5, 5  # mini_map
         self.PLAYER_ANGLE = 0
@@ -88,6 +89,21 @@ class GameSettings:
         self.resolution = _resolution_900
         self.fps_limit = 0
 
+        # process-pool npc AI, number of worker processes, 0 runs the AI on the main thread
+        self.ai_workers = 0
+        # compile ray casting, line of sight and path finding with numba when it is installed
+        self.jit_kernels = True
+        # count surfaces per owner and compare tracemalloc snapshots at every level start, slows the game down
+        self.memory_monitor = False
+        # record the input of every session into a replay, see benchmarks/replay.py
+        self.record_replay = False
+        # simulate the next frame while a render thread draws the previous one
+        self.pipelined_render = False
+        # draw the game into a window of the launcher driven by the Qt event loop instead of a pygame window
+        self.embedded_view = False
+        # run the game in a separate process sending the score to the launcher, not used with embedded_view
+        self.game_process = False
+
         if fpath.is_file():
             self.load(fpath)
             self._prepare_static_vals()
@@ -108,15 +124,27 @@ class GameSettings:
                 'fullscreen': self.fullscreen,
                 'res_width': self.resolution[0],
                 'res_height': self.resolution[1],
-                'fps_limit': self.fps_limit
+                'fps_limit': self.fps_limit,
+
+                'ai_workers': self.ai_workers,
+                'jit_kernels': self.jit_kernels,
+                'memory_monitor': self.memory_monitor,
+                'record_replay': self.record_replay,
+                'pipelined_render': self.pipelined_render,
+                'embedded_view': self.embedded_view,
+                'game_process': self.game_process
             }
 
-    def save(self, fpath: pl.Path = pl.Path(os.getenv('LOCALAPPDATA')) / 'PyQt_DOOM' / 'settings.json'):
+    def save(self, fpath: pl.Path = None):
+        if fpath is None:
+            fpath = app_dir() / 'settings.json'
         self._prepare_static_vals()
         the_dict = self.get_dict()
         save_json(the_dict, fpath)
 
-    def load(self, fpath: pl.Path = pl.Path(os.getenv('LOCALAPPDATA')) / 'PyQt_DOOM' / 'settings.json'):
+    def load(self, fpath: pl.Path = None):
+        if fpath is None:
+            fpath = app_dir() / 'settings.json'
         the_dict = load_json(fpath)
         self.original_pack = the_dict['original_pack']
 
@@ -130,6 +158,14 @@ class GameSettings:
         self.resolution = the_dict['res_width'], the_dict['res_height']
         self.fps_limit = the_dict['fps_limit']
 
+        self.ai_workers = the_dict.get('ai_workers', 0)
+        self.jit_kernels = the_dict.get('jit_kernels', True)
+        self.memory_monitor = the_dict.get('memory_monitor', False)
+        self.record_replay = the_dict.get('record_replay', False)
+        self.pipelined_render = the_dict.get('pipelined_render', False)
+        self.embedded_view = the_dict.get('embedded_view', False)
+        self.game_process = the_dict.get('game_process', False)
+
         self._prepare_static_vals()
 
     def HALF_WIDTH_fnc(self) -> int:
@@ -167,13 +203,13 @@ class GameSettings:
         self.SCALE = self.SCALE_fnc()
 
 
-class _SettingsDialog(QDialog, _help_dialog):
+class _SettingsDialog(QDialog):
 
-    def __init__(self, fpath: pl.Path = pl.Path(os.getenv('LOCALAPPDATA')) / 'PyQt_DOOM' / 'settings.json',
+    def __init__(self, fpath: pl.Path = None,
                  parent=None):
         QDialog.__init__(self, parent, Qt.WindowSystemMenuHint | Qt.WindowTitleHint | Qt.WindowCloseButtonHint)
 
-        self.setupUi(self)
+        load_ui(_help_path, self)
 
         self.setWindowTitle("Settings")
 
@@ -227,6 +263,8 @@ class _SettingsDialog(QDialog, _help_dialog):
             raise ValueError
 
     def _test_sound_music(self):
+        import pygame as pg
+        from PyQt_DOOM.sound import Sound
         self._update_settings()
         sound = Sound(None, self.settings)
         pg.mixer.music.play()
@@ -234,17 +272,20 @@ class _SettingsDialog(QDialog, _help_dialog):
         pg.mixer.music.stop()
 
     def _test_sound_enemies(self):
+        from PyQt_DOOM.sound import Sound
         self._update_settings()
         sound = Sound(None, self.settings)
         sound_this = random.choice([sound.npc_pain, sound.npc_pain2, sound.npc_death, sound.npc_shot])
         sound_this.play()
 
     def _test_sound_player(self):
+        from PyQt_DOOM.sound import Sound
         self._update_settings()
         sound = Sound(None, self.settings)
         sound.player_pain.play()
 
     def _test_sound_weapon(self):
+        from PyQt_DOOM.sound import Sound
         self._update_settings()
         sound = Sound(None, self.settings)
         sound.shotgun.play()
@@ -0,0 +1,118 @@
+import numpy as np
+import json
+import os
+from datetime import datetime
+from loguru import logger
+
+from PyQt_DOOM.app_paths import app_dir
+from PyQt_DOOM.profiler import STAGES, GC, FRAME
+from PyQt_DOOM.event_log import event_log, EventType, INFO
+
+
+HITCH_EVENT = EventType('hitch', INFO, "Hitch: frame {} of level {} took {:.1f} ms, {} {:.1f} ms")
+
+
+class FrameTelemetry:
+    """
+    Frame time histogram of a whole play session and the frames slower than the hitch threshold.
+
+    Frame times are counted in bins of bin_ms up to max_ms, longer frames go to the last bin, so percentiles of any
+    session length are read from a fixed size array. A hitch is stored with the stage that took the most of it, 'gc'
+    when garbage collection took at least half of the frame and 'other' when most of the frame was spent outside the
+    timed stages.
+    """
+    def __init__(self, hitch_ms=50.0, bin_ms=0.1, max_ms=250.0, max_hitches=1000):
+        self.hitch_ms = hitch_ms
+        self.bin_ms = bin_ms
+        self.histogram = np.zeros(int(max_ms / bin_ms) + 1, np.int64)
+        self.max_hitches = max_hitches
+        self.hitches = []
+        self.hitch_count = 0
+        self.frames = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.stage_total_ms = [0.0] * len(STAGES)
+        self.start_time = datetime.now()
+
+    def add(self, frame, level=1):
+        """
+        :param frame:   stage times of one frame in seconds, as kept by FrameProfiler
+        :param level:   level being played, stored with hitches
+        """
+        frame_ms = frame[FRAME] * 1000
+        self.histogram[min(int(frame_ms / self.bin_ms), len(self.histogram) - 1)] += 1
+        self.frames += 1
+        self.total_ms += frame_ms
+        self.max_ms = max(self.max_ms, frame_ms)
+        for i, stage_time in enumerate(frame):
+            self.stage_total_ms[i] += stage_time * 1000
+        if frame_ms > self.hitch_ms:
+            self.hitch_count += 1
+            hitch = {'frame': self.frames - 1, 'level': level, 'frame_ms': round(frame_ms, 3), **self.cause(frame)}
+            event_log.log(HITCH_EVENT, hitch['frame'], level, frame_ms, hitch['stage'], hitch['stage_ms'])
+            if len(self.hitches) < self.max_hitches:
+                self.hitches.append(hitch)
+
+    @staticmethod
+    def cause(frame) -> dict:
+        stages = range(GC)
+        stage = max(stages, key=frame.__getitem__)
+        stage_name, stage_time = STAGES[stage], frame[stage]
+        other = frame[FRAME] - sum(frame[i] for i in stages)
+        if frame[GC] >= frame[FRAME] / 2:
+            stage_name, stage_time = 'gc', frame[GC]
+        elif other > stage_time:
+            stage_name, stage_time = 'other', other
+        return {'stage': stage_name, 'stage_ms': round(stage_time * 1000, 3), 'gc_ms': round(frame[GC] * 1000, 3)}
+
+    def percentile(self, q) -> float:
+        """
+        :return:    upper edge in ms of the histogram bin holding the q-th percentile frame
+        """
+        if not self.frames:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.histogram), q / 100 * self.frames))
+        return round(min((index + 1) * self.bin_ms, self.max_ms), 3)
+
+    def summary(self) -> dict:
+        return {
+            'frames': self.frames,
+            'mean_ms': self.total_ms / self.frames if self.frames else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+            'hitch_ms': self.hitch_ms,
+            'hitches': self.hitch_count,
+        }
+
+    def write_session(self, settings, folder=None):
+        """
+        Write the session summary, the per-stage mean times and the stored hitches to a json file named by the session
+        start time.
+        """
+        if folder is None:
+            folder = app_dir() / 'sessions'
+        if not self.frames:
+            return None
+        if not folder.is_dir():
+            os.makedirs(folder)
+        summary = self.summary()
+        session = {
+            'start': self.start_time.isoformat(timespec='seconds'),
+            'end': datetime.now().isoformat(timespec='seconds'),
+            'resolution': list(settings.resolution),
+            'fps_limit': settings.fps_limit,
+            'jit_kernels': settings.jit_kernels,
+            'ai_workers': settings.ai_workers,
+            'summary': summary,
+            'stage_mean_ms': {stage: total / self.frames for stage, total in zip(STAGES, self.stage_total_ms)},
+            'hitches': self.hitches,
+        }
+        path = folder / self.start_time.strftime('session_%Y%m%d_%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump(session, f, indent=4)
+        logger.info(f"FrameTelemetry: {summary['frames']} frames, p50 {summary['p50_ms']:.1f} ms, "
+                    f"p95 {summary['p95_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms, max {summary['max_ms']:.1f} ms, "
+                    f"{summary['hitches']} hitches, session written to {path}")
+        return path
@@ -0,0 +1,51 @@
+import importlib.util
+import pathlib as pl
+
+
+_package_dir = pl.Path(__file__).parent
+
+
+def compiled_path(ui_path) -> pl.Path:
+    ui_path = pl.Path(ui_path)
+    return ui_path.with_name(ui_path.stem + '_ui.py')
+
+
+def ui_class(ui_path):
+    """
+    :return:    form class of the .ui file, imported from its precompiled module when that is up to date, compiled by
+                uic otherwise
+    """
+    ui_path = pl.Path(ui_path)
+    compiled = compiled_path(ui_path)
+    if compiled.is_file() and compiled.stat().st_mtime >= ui_path.stat().st_mtime:
+        spec = importlib.util.spec_from_file_location(f"PyQt_DOOM_{compiled.stem}", compiled)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return next(getattr(module, name) for name in dir(module) if name.startswith('Ui_'))
+
+    from PyQt5 import uic
+    return uic.loadUiType(ui_path)[0]
+
+
+def load_ui(ui_path, widget):
+    """
+    Set the form up on an existing widget and expose its child widgets as attributes, like uic.loadUi does.
+    """
+    ui = ui_class(ui_path)()
+    ui.setupUi(widget)
+    for name, value in vars(ui).items():
+        setattr(widget, name, value)
+
+
+def compile_ui():
+    """
+    Precompile every .ui file of the package into a python module next to it.
+    """
+    from PyQt5 import uic
+    for ui_path in _package_dir.rglob('*.ui'):
+        with open(ui_path) as ui_file, open(compiled_path(ui_path), 'w') as py_file:
+            uic.compileUi(ui_file, py_file)
+
+
+if __name__ == '__main__':
+    compile_ui()
@@ -2,12 +2,13 @@ from PyQt_DOOM.sprite_object import *
 
 
 class Weapon(AnimatedSprite):
-    def __init__(self, game, path=str(pl.Path(__file__).parent / 'resources'/'sprites'/'weapon'/'shotgun'/'0.png'), scale=0.4, animation_time=90):
+    def __init__(self, game, path=None, scale=0.4, animation_time=90):
+        if path is None:
+            path = assets.path('sprites', 'weapon', 'shotgun', '0.png')
         super().__init__(game=game, path=path, scale=scale, animation_time=animation_time)
         s = game.settings
-        self.images = deque(
-            [pg.transform.smoothscale(img, (self.image.get_width() * scale, self.image.get_height() * scale))
-             for img in self.images])
+        size = self.image.get_width() * scale, self.image.get_height() * scale
+        self.images = tuple(assets.scaled(file_path, size, smooth=True) for file_path in assets.list_dir(self.path))
         self.weapon_pos = (s.HALF_WIDTH - self.images[0].get_width() // 2, s.resolution[1] - self.images[0].get_height())
         self.reloading = False
         self.num_images = len(self.images)
@@ -18,15 +19,23 @@ class Weapon(AnimatedSprite):
         if self.reloading:
             self.game.player.shot = False
             if self.animation_trigger:
-                self.images.rotate(-1)
-                self.image = self.images[0]
                 self.frame_counter += 1
                 if self.frame_counter == self.num_images:
                     self.reloading = False
                     self.frame_counter = 0
+                self.image = self.images[self.frame_counter]
+
+    def reset(self, pos=None):
+        super().reset(pos)
+        self.image = self.images[0]
+        self.reloading = False
+        self.frame_counter = 0
 
     def draw(self):
-        self.game.screen.blit(self.images[0], self.weapon_pos)
+        self.draw_frame(self.frame_counter)
+
+    def draw_frame(self, frame_counter):
+        self.game.screen.blit(self.images[frame_counter], self.weapon_pos)
 
     def update(self):
         self.check_animation_time()
@@ -0,0 +1,249 @@
+"""
+Engine hot path benchmark.
+
+Times ray casting, wall column preparation, sprite projection, NPC line of sight, pathfinding and a full frame at
+every resolution of the settings dialog, from fixed player poses on the game map and on larger generated maps. Every
+case reports the median, minimum and mean time of one call over all poses and repeats.
+
+Results are written as json and can be compared with a saved baseline, cases slower than the baseline by more than
+the tolerance are listed and make the script exit with status 1.
+
+    python benchmarks/engine.py [--repeat 20] [--output engine.json] [--baseline baseline.json] [--tolerance 0.15]
+"""
+import argparse
+import json
+import math
+import os
+import pathlib as pl
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+
+_repo_dir = pl.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_repo_dir))
+os.environ.setdefault('LOCALAPPDATA', tempfile.mkdtemp())
+if 'DISPLAY' not in os.environ and sys.platform.startswith('linux'):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+
+from PyQt_DOOM.game import Game
+from PyQt_DOOM.map import Map, mini_map
+from PyQt_DOOM.npc import SoldierNPC
+from PyQt_DOOM.pathfinding import PathFinding
+from PyQt_DOOM.src.game_settings.settings import GameSettings, _resolutions
+
+
+# player poses (x, y, angle) and npc positions on mini_map
+_mini_map_poses = [(1.5, 5.0, 0.0), (7.3, 30.2, 4.6), (8.1, 12.6, 0.3), (12.4, 17.7, 3.4)]
+_mini_map_npcs = [(11.5, 4.5), (13.5, 6.5), (2.5, 20.5), (4.5, 29.5), (5.5, 14.5), (14.5, 25.5)]
+
+
+def generated_map(size, seed=0) -> list:
+    """
+    :return:    square map layout with a solid border, a pillar every 4 tiles and random walls on 10 % of the rest
+    """
+    rnd = random.Random(seed)
+    layout = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            if x in (0, size - 1) or y in (0, size - 1):
+                row.append(1)
+            elif (x % 4 == 0 and y % 4 == 0) or rnd.random() < 0.1:
+                row.append(rnd.randint(1, 6))
+            else:
+                row.append(False)
+        layout.append(row)
+    return layout
+
+
+def _free_positions(layout, count, seed):
+    rnd = random.Random(seed)
+    free = [(x, y) for y, row in enumerate(layout) for x, value in enumerate(row) if not value]
+    return [(x + 0.5, y + 0.5) for x, y in rnd.sample(free, count)]
+
+
+def maps() -> dict:
+    """
+    :return:    name: (layout, player poses, npc positions)
+    """
+    result = {'mini_map': (mini_map, _mini_map_poses, _mini_map_npcs)}
+    for size in (64, 128):
+        layout = generated_map(size, seed=size)
+        poses = [(x, y, i * math.tau / 4 + 0.3) for i, (x, y) in enumerate(_free_positions(layout, 4, seed=1))]
+        result[f'generated_{size}'] = layout, poses, _free_positions(layout, 6, seed=2)
+    return result
+
+
+def measure(fnc, poses, repeat, setup=None, warmup=2) -> dict:
+    """
+    Call fnc(pose) for every pose, repeat times, after warmup rounds that are not timed.
+
+    :param setup:   called with the pose before every call, not timed
+    """
+    for i in range(warmup):
+        for pose in poses:
+            if setup is not None:
+                setup(pose)
+            fnc(pose)
+    times = []
+    for i in range(repeat):
+        for pose in poses:
+            if setup is not None:
+                setup(pose)
+            time_start = time.perf_counter()
+            fnc(pose)
+            times.append(time.perf_counter() - time_start)
+    return {
+        'median_ms': statistics.median(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'mean_ms': statistics.fmean(times) * 1000,
+        'samples': len(times),
+    }
+
+
+def _new_game(resolution, jit):
+    settings = GameSettings(pl.Path(tempfile.mkdtemp()) / 'settings.json')
+    settings.resolution = resolution
+    settings.jit_kernels = jit
+    settings._prepare_static_vals()
+    random.seed(0)
+    game = Game(lambda enemy_type='': None, lambda: None, lambda: None, lambda: 0, settings)
+    game.object_handler.spawn_director.wave_interval = math.inf
+    return game
+
+
+def _load_map(game, layout, npc_positions):
+    game.map = Map(game, layout)
+    game.pathfinding = PathFinding(game)
+    handler = game.object_handler
+    handler.reset()
+    handler.spawn_director.pending = 0
+    handler.npc_list = [handler.get_npc(SoldierNPC, pos) for pos in npc_positions]
+    handler.npc_positions = {npc.map_pos for npc in handler.npc_list}
+
+
+def _set_pose(game, pose):
+    game.player.x, game.player.y, game.player.angle = pose
+
+
+def bench_resolution(resolution, repeat, jit) -> dict:
+    game = _new_game(resolution, jit)
+    raycasting = game.raycasting
+    results = {}
+    try:
+        for map_name, (layout, poses, npc_positions) in maps().items():
+            _load_map(game, layout, npc_positions)
+            sprites = game.object_handler.sprite_list
+            npcs = game.object_handler.npc_list
+            pathfinding = game.pathfinding
+
+            def ray_cast(pose):
+                _set_pose(game, pose)
+                raycasting.ray_cast()
+
+            def objects_to_render(pose):
+                # the ray casting result of the pose is prepared by the setup
+                raycasting.get_objects_to_render()
+
+            def sprite_projection(pose):
+                _set_pose(game, pose)
+                raycasting.objects_to_render = []
+                for sprite in sprites:
+                    sprite.get_sprite()
+
+            def npc_line_of_sight(pose):
+                _set_pose(game, pose)
+                for npc in npcs:
+                    npc.get_sprite()
+                    npc.ray_cast_player_npc()
+
+            def pathfinding_path(pose):
+                goal = int(pose[0]), int(pose[1])
+                for npc in npcs:
+                    # uncached, the game caches paths per level
+                    PathFinding.get_path.__wrapped__(pathfinding, npc.map_pos, goal)
+
+            def frame(pose):
+                _set_pose(game, pose)
+                game.check_events()
+                game.update()
+                game.draw()
+
+            cases = {'ray_cast': ray_cast, 'objects_to_render': objects_to_render,
+                     'sprite_projection': sprite_projection, 'npc_line_of_sight': npc_line_of_sight,
+                     'pathfinding': pathfinding_path, 'frame': frame}
+            for case, fnc in cases.items():
+                setup = ray_cast if case == 'objects_to_render' else None
+                results[f"{resolution[0]}x{resolution[1]}/{map_name}/{case}"] = measure(fnc, poses, repeat, setup)
+    finally:
+        game.level_loader.close()
+    return results
+
+
+def compare(results, baseline, tolerance) -> list:
+    """
+    :return:    names of the cases whose median is slower than the baseline by more than the tolerance
+    """
+    regressions = []
+    print(f"{'case':<48}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result['median_ms'] / reference['median_ms'] if reference['median_ms'] else math.inf
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  slower'
+        print(f"{name:<48}{reference['median_ms']:>10.3f}ms{result['median_ms']:>10.3f}ms{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--resolutions', nargs='*', help='subset like 1600x900, every resolution by default')
+    parser.add_argument('--no-jit', action='store_true', help='run the pure python kernels even with numba installed')
+    parser.add_argument('--output', type=pl.Path)
+    parser.add_argument('--baseline', type=pl.Path)
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    resolutions = _resolutions
+    if args.resolutions:
+        resolutions = [tuple(map(int, r.split('x'))) for r in args.resolutions]
+
+    results = {}
+    for resolution in resolutions:
+        results.update(bench_resolution(resolution, args.repeat, not args.no_jit))
+    from PyQt_DOOM import kernels
+    output = {
+        'python': sys.version.split()[0],
+        'pygame': pg.version.ver,
+        'platform': platform.platform(),
+        'jit': kernels.JIT and not args.no_jit,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=4))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text())['results'], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} cases slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+    else:
+        for name, result in results.items():
+            print(f"{name:<48}{result['median_ms']:>10.3f} ms  (min {result['min_ms']:.3f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Snapshot server check over localhost.
+
+Runs a recorded session from benchmarks/replays headless on the snapshot server of PyQt_DOOM.net, on the dummy SDL
+video and audio drivers, with simulated clients connected over UDP on localhost. The first client follows the player,
+the others watch from random free tiles of the map. After every frame the clients read their snapshots and
+interpolate the world, and every snapshot a client decoded is compared with the one the server sent it. Entity ids
+are checked not to be used again on a later level, NPCs are pooled between levels and a new spawn needs a new id.
+
+Prints per client the snapshots received, the bytes per snapshot and the part of the frames that were interpolated,
+and the size of the delta snapshots compared with full ones. Exits with status 1 when a client decoded a snapshot
+different from the sent one, saw an entity id on more than one level or received none.
+
+    python benchmarks/netplay.py [benchmarks/replays/patrol.json] [--clients 4] [--tick-rate 20] [--loss 0.1]
+"""
+import argparse
+import os
+import pathlib as pl
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+
+_repo_dir = pl.Path(__file__).resolve().parent.parent
+_replay_dir = pl.Path(__file__).resolve().parent / 'replays'
+sys.path.insert(0, str(_repo_dir))
+os.environ.setdefault('LOCALAPPDATA', tempfile.mkdtemp())
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from PyQt_DOOM.game import Game
+from PyQt_DOOM.net import SnapshotServer, SnapshotClient, run_server
+from PyQt_DOOM.replay import Replay
+from PyQt_DOOM.src.game_settings.settings import GameSettings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('replay', nargs='?', type=pl.Path, default=_replay_dir / 'patrol.json')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--tick-rate', type=int, default=20)
+    parser.add_argument('--interpolation', type=int, default=100, help='ms the clients show behind the server')
+    parser.add_argument('--loss', type=float, default=0.0, help='part of the snapshots the server drops')
+    parser.add_argument('--realtime', action='store_true', help='run the session at its real speed')
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    settings = GameSettings(pl.Path(tempfile.mkdtemp()) / 'settings.json')
+    if replay.resolution is not None:
+        settings.resolution = replay.resolution
+    settings.ai_workers = 0
+    settings.pipelined_render = False
+    settings.memory_monitor = False
+    settings.record_replay = False
+    settings._prepare_static_vals()
+    score = [0]
+
+    def score_plus(enemy_type=''):
+        score[0] += 1
+
+    def score_reset():
+        score[0] = 0
+
+    game = Game(score_plus, score_reset, lambda: None, lambda: score[0], settings, host=replay)
+    server = SnapshotServer(game, args.port, args.tick_rate, loss=args.loss)
+    rows, cols = np.nonzero(game.map.grid == 0)
+    tiles = random.Random(replay.seed).sample(list(zip(cols.tolist(), rows.tolist())), args.clients - 1)
+    views = [None] + [(x + 0.5, y + 0.5) for x, y in tiles]
+    clients = [SnapshotClient(server.address, view, args.interpolation, clock=game.get_ticks) for view in views]
+    mismatches = [0] * len(clients)
+    visible = [0] * len(clients)
+    reused = [0] * len(clients)
+    # level of every server tick and the level every entity id was first seen on
+    tick_levels = {}
+    id_levels = {}
+
+    def end_frame():
+        tick_levels[server.tick] = game.level
+        for i, client in enumerate(clients):
+            if client.latest is None:
+                client.hello()
+            if client.receive():
+                sent = server.clients[client.address].sent.get(client.latest.tick)
+                if sent is not None and (sent.player, sent.entities) != (client.latest.player, client.latest.entities):
+                    mismatches[i] += 1
+                visible[i] += len(client.latest.entities)
+                level = tick_levels[client.latest.tick]
+                reused[i] += sum(id_levels.setdefault(entity_id, level) != level
+                                 for entity_id in client.latest.entities)
+            client.interpolate()
+
+    run_server(game, server, args.realtime, end_frame)
+    for client in clients:
+        client.close()
+
+    print(f"{replay.frame} frames, {server.tick} ticks, {server.snapshots_sent} snapshots sent, "
+          f"{server.bytes_sent / max(1, server.full_bytes):.0%} of the full snapshot size, {game.level} levels")
+    print(f"{'client':<24}{'snapshots':>10}{'bytes':>10}{'visible':>10}{'undecodable':>13}{'interpolated':>14}"
+          f"{'mismatches':>12}{'reused ids':>12}")
+    failed = False
+    for client, view, mismatch, seen, reuse in zip(clients, views, mismatches, visible, reused):
+        name = 'player' if view is None else f"tile {int(view[0])}, {int(view[1])}"
+        frames = client.interpolated + client.held
+        print(f"{name:<24}{client.received:>10}{client.bytes_received / max(1, client.received):>10.1f}"
+              f"{seen / max(1, client.received):>10.1f}{client.undecodable:>13}"
+              f"{client.interpolated / max(1, frames):>14.0%}{mismatch:>12}{reuse:>12}")
+        failed = failed or mismatch or reuse or not client.received
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Performance regression gate.
+
+Plays the recorded sessions in benchmarks/replays through the game with the simulated clock of PyQt_DOOM.replay, on
+the dummy SDL video and audio drivers, so it runs on a machine without display or sound. Every session collects the
+mean time per frame stage and the frame time percentiles, and counts that do not depend on the machine: pathfinding
+node expansions, counted with the python path finding only, and surfaces scaled for the frame. Container objects
+allocated and not freed and memory blocks still allocated at the end are reported too, the allocations change between
+runs and are not compared.
+
+With numba installed the compiled kernels are first compared with the pure python ray casting, line of sight and path
+finding on random positions, any mismatch makes the script exit with status 1.
+
+Results are written as json and compared with a saved baseline. A session has to play the same frames, levels and
+kills as in the baseline, times may be slower by the tolerance and the deterministic counts may grow by the count
+tolerance, any other difference is listed and makes the script exit with status 1. benchmarks/baseline.json holds the
+counts of the shipped sessions with the python path finding and is compared on any machine, a baseline with the times
+has to be made on the machine running the gate.
+
+    python benchmarks/replay.py --baseline benchmarks/baseline.json --repeat 1
+    python benchmarks/replay.py --output baseline.json
+    python benchmarks/replay.py --baseline baseline.json [--repeat 3] [--tolerance 0.25] [--count-tolerance 0.05]
+    python benchmarks/replay.py --output benchmarks/baseline.json --counts-only --repeat 1
+
+Sessions recorded with the record_replay setting are written to the replays folder next to the scores and can be
+copied to benchmarks/replays.
+"""
+import argparse
+import json
+import math
+import os
+import pathlib as pl
+import platform
+import statistics
+import sys
+import tempfile
+import gc
+
+
+_repo_dir = pl.Path(__file__).resolve().parent.parent
+_replay_dir = pl.Path(__file__).resolve().parent / 'replays'
+sys.path.insert(0, str(_repo_dir))
+os.environ.setdefault('LOCALAPPDATA', tempfile.mkdtemp())
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+
+from PyQt_DOOM import kernels
+from PyQt_DOOM.game import Game
+from PyQt_DOOM.pathfinding import PathFinding
+from PyQt_DOOM.profiler import STAGES, FRAME
+from PyQt_DOOM.replay import Replay
+from PyQt_DOOM.src.game_settings.settings import GameSettings
+
+
+# stages reported by the gate, the rest are either tiny or not run with the simulated clock
+_stages = ('player', 'ray_cast', 'objects_to_render', 'sprites', 'npc_ai', 'pathfinding', 'weapon', 'draw',
+           'render_wait', 'level_load', 'gc')
+# a session is compared only when it played the same frames, levels and kills as in the baseline
+_session = ('frames', 'levels', 'kills')
+# counts equal on every run of a session, path expansions are not counted by the numba kernels. The retained blocks
+# depend on the level loader thread and are compared with the time tolerance
+_counts = ('path_expansions', 'scaled_surfaces')
+# reported only, the allocations depend on the level loader thread and on when the collector runs
+_reported = ('net_allocations',)
+
+
+def _net_allocations() -> int:
+    """
+    :return:    container objects allocated minus the ones freed since the start of the process, every collection runs
+                when the first generation counter passes its threshold and resets it
+    """
+    collections = sum(generation['collections'] for generation in gc.get_stats())
+    return collections * gc.get_threshold()[0] + gc.get_count()[0]
+
+
+def play(path, jit, pipeline=False) -> dict:
+    """
+    Play one session from the start to its last frame.
+
+    :return:    metric: value, times in ms
+    """
+    replay = Replay.load(path)
+    settings = GameSettings(pl.Path(tempfile.mkdtemp()) / 'settings.json')
+    if replay.resolution is not None:
+        settings.resolution = replay.resolution
+    settings.jit_kernels = jit
+    settings.pipelined_render = pipeline
+    settings.ai_workers = 0
+    settings.memory_monitor = False
+    settings.record_replay = False
+    settings._prepare_static_vals()
+    score = [0]
+
+    def score_plus(enemy_type=''):
+        # finished levels are counted by the level
+        if enemy_type != 'Level Finished':
+            score[0] += 1
+
+    def score_reset():
+        score[0] = 0
+
+    game = Game(score_plus, score_reset, lambda: None, lambda: score[0], settings, host=replay)
+    PathFinding.expansions = 0
+    gc.collect()
+    allocations = _net_allocations()
+    blocks = sys.getallocatedblocks()
+    surfaces = 0
+    try:
+        while game.running:
+            game.run_frame()
+            if game.transition is None:
+                raycasting = game.raycasting
+                if raycasting.deferred:
+                    surfaces += len(raycasting.ray_casting_result) + len(raycasting.sprite_projections)
+                else:
+                    surfaces += len(raycasting.objects_to_render)
+    finally:
+        if game.pipeline is not None:
+            game.pipeline.close()
+        game.level_loader.close()
+        game.profiler.close()
+        gc.unfreeze()
+    allocations = _net_allocations() - allocations
+    gc.collect()
+
+    telemetry = game.telemetry
+    summary = telemetry.summary()
+    result = {
+        'frames': replay.frame,
+        'levels': game.level,
+        'kills': score[0],
+        'frame_p50_ms': summary['p50_ms'],
+        'frame_p95_ms': summary['p95_ms'],
+        'frame_mean_ms': telemetry.stage_total_ms[FRAME] / telemetry.frames,
+    }
+    for stage in _stages:
+        result[f'{stage}_ms'] = telemetry.stage_total_ms[STAGES.index(stage)] / telemetry.frames
+    if game.kernels is None:
+        result['path_expansions'] = PathFinding.expansions
+    result.update({
+        'scaled_surfaces': surfaces,
+        'net_allocations': allocations,
+        'retained_blocks': sys.getallocatedblocks() - blocks,
+    })
+    return result
+
+
+def run(paths, repeat, jit, pipeline=False) -> dict:
+    """
+    :return:    session name: metrics, the median of every metric over the repeats
+    """
+    results = {}
+    for path in paths:
+        runs = [play(path, jit, pipeline) for i in range(repeat)]
+        results[pl.Path(path).stem] = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+        differs = [metric for metric in _session + _counts if metric in runs[0]
+                   and any(run[metric] != runs[0][metric] for run in runs)]
+        if differs:
+            print(f"{pl.Path(path).stem}: {', '.join(differs)} differ between repeats, the session is not deterministic")
+    return results
+
+
+def compare(results, baseline, tolerance, count_tolerance) -> list:
+    """
+    :return:    session/metric names that are worse than the baseline by more than their tolerance, sessions playing
+                a different number of frames, levels or kills are not compared
+    """
+    regressions = []
+    print(f"{'metric':<44}{'baseline':>14}{'current':>14}{'ratio':>8}")
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if any(metrics[metric] != reference[metric] for metric in _session):
+            print(f"{name}: {metrics['frames']} frames on {metrics['levels']} levels with {metrics['kills']} kills, "
+                  f"baseline {reference['frames']} on {reference['levels']} with {reference['kills']}, not compared")
+            regressions.append(name)
+            continue
+        for metric, value in metrics.items():
+            if metric in _session + _reported or metric not in reference:
+                continue
+            limit = count_tolerance if metric in _counts else tolerance
+            base = reference[metric]
+            ratio = value / base if base else (1.0 if not value else math.inf)
+            flag = ''
+            if ratio > 1 + limit:
+                regressions.append(f"{name}/{metric}")
+                flag = '  worse'
+            print(f"{name + '/' + metric:<44}{base:>14.3f}{value:>14.3f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('replays', nargs='*', type=pl.Path, help='session files, benchmarks/replays/*.json by default')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jit', action='store_true', help='run the numba kernels, path expansions are not counted')
+    parser.add_argument('--pipeline', action='store_true', help='render on a separate thread, pipelined_render')
+    parser.add_argument('--output', type=pl.Path)
+    parser.add_argument('--counts-only', action='store_true',
+                        help='write only the deterministic counts to the output, as in benchmarks/baseline.json')
+    parser.add_argument('--baseline', type=pl.Path)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown of stage and frame times')
+    parser.add_argument('--count-tolerance', type=float, default=0.05, help='allowed growth of counts')
+    parser.add_argument('--kernel-samples', type=int, default=500,
+                        help='random positions the numba kernels are checked on, 0 skips the check')
+    args = parser.parse_args()
+
+    if kernels.JIT and args.kernel_samples and kernels.check_backends(args.kernel_samples):
+        print("numba kernels differ from the python methods")
+        sys.exit(1)
+
+    paths = args.replays or sorted(_replay_dir.glob('*.json'))
+    results = run(paths, args.repeat, args.jit, args.pipeline)
+    output = {
+        'python': sys.version.split()[0],
+        'pygame': pg.version.ver,
+        'platform': platform.platform(),
+        'jit': args.jit,
+        'pipeline': args.pipeline,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.counts_only:
+        output['results'] = {name: {metric: value for metric, value in metrics.items() if metric in _session + _counts}
+                             for name, metrics in results.items()}
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=4))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text())['results'], args.tolerance,
+                              args.count_tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}")
+            sys.exit(1)
+    else:
+        for name, metrics in results.items():
+            print(name)
+            for metric, value in metrics.items():
+                print(f"    {metric:<24}{value:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Launcher startup benchmark.
+
+Reports the import tree of the launcher module (python -X importtime) and the time from interpreter start until the
+main window has been shown and the Qt event loop has turned once, as the median of several cold processes.
+
+    python benchmarks/startup.py [--runs 5] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import pathlib as pl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+_repo_dir = pl.Path(__file__).resolve().parent.parent
+
+_window_snippet = '''
+import json, time
+time_start = time.perf_counter()
+from PyQt5 import QtCore, QtWidgets
+from PyQt_DOOM.PyQt_DOOM import Main
+app = QtWidgets.QApplication([])
+form = Main()
+QtCore.QTimer.singleShot(0, app.quit)
+app.exec_()
+print(json.dumps({'time_to_window': time.perf_counter() - time_start}))
+'''
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(_repo_dir), env.get('PYTHONPATH', '')])
+    if 'LOCALAPPDATA' not in env:
+        env['LOCALAPPDATA'] = tempfile.mkdtemp()
+    scores = pl.Path(env['LOCALAPPDATA']) / 'PyQt_DOOM' / 'scores'
+    scores.mkdir(parents=True, exist_ok=True)
+    if 'DISPLAY' not in env and sys.platform.startswith('linux'):
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    return env
+
+
+def import_tree(module='PyQt_DOOM.PyQt_DOOM', depth=2) -> list[dict]:
+    """
+    :return:    imports up to the given nesting depth with self and cumulative time in ms, slowest first
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          env=_env(), capture_output=True, text=True, check=True)
+    tree = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip())) // 2
+        if level <= depth:
+            tree.append({'module': name.strip(), 'level': level,
+                         'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(tree, key=lambda x: x['cumulative_ms'], reverse=True)
+
+
+def time_to_window(runs=5) -> dict:
+    in_process, total = [], []
+    for i in range(runs):
+        time_start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', _window_snippet], env=_env(), capture_output=True, text=True,
+                              check=True)
+        total.append(time.perf_counter() - time_start)
+        in_process.append(json.loads(proc.stdout.strip().splitlines()[-1])['time_to_window'])
+    return {
+        'runs': runs,
+        'time_to_window_ms': statistics.median(in_process) * 1000,
+        'process_to_window_ms': statistics.median(total) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', type=pl.Path)
+    args = parser.parse_args()
+
+    tree = import_tree()
+    window = time_to_window(args.runs)
+    result = {'python': sys.version.split()[0], 'window': window, 'imports': tree}
+
+    print(f"time to window {window['time_to_window_ms']:.1f} ms "
+          f"(process start to window {window['process_to_window_ms']:.1f} ms, median of {window['runs']})")
+    for entry in tree[:15]:
+        print(f"{entry['cumulative_ms']:9.1f} ms  {'  ' * entry['level']}{entry['module']}")
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=4))
+
+
+if __name__ == '__main__':
+    main()